@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark the scanner offline, on synthetic radio websites.
+
+Start a local synthetic_server, used as http proxy, and explore
+its sites with Site.find_mail, or with the CrawlEngine used by
+parse_radio_file. Report throughput, fetches per site and recall
+of the domain mails.
+"""
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from scanner.crawler import CrawlEngine
+from scanner.logger import LogRadio
+from scanner.metrics import CrawlMetrics
+from scanner.session import get_session
+from scanner.site import Site
+from synthetic_server import SiteSpec, SyntheticServer
+
+
+def explore_sites(hosts, concurrency):
+    """
+    Explore each site with Site.find_mail.
+    return: ({host : domain mails}, CrawlMetrics)
+    """
+    metrics = CrawlMetrics()
+    def explore(host):
+        site = Site(host)
+        site.find_mail()
+        metrics.add_site(site.metrics)
+        return host, site.domain_mails
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return dict(pool.map(explore, hosts)), metrics
+
+def explore_file(hosts, concurrency):
+    """
+    Explore sites of a generated template with CrawlEngine, as
+    parse_radio_file does.
+    return: ({host : domain mails}, CrawlMetrics)
+    """
+    metrics = CrawlMetrics()
+    with tempfile.TemporaryDirectory() as directory:
+        template = os.path.join(directory, "bench.template")
+        with open(template, "w", encoding="utf8") as template_file:
+            template_file.write("Synthetic;;;\n")
+            for host in hosts:
+                template_file.write(f"{host};{host};;\n")
+        log_file = LogRadio(template)
+        CrawlEngine(log_file, concurrency, metrics=metrics).run()
+    radios = log_file.radio_list()
+    return {radio.site : radio.domain_mails for radio in radios}, metrics
+
+def report(spec, results, metrics, elapsed, server):
+    """
+    Print speed and recall of a run.
+    """
+    fetches = [site["fetches"] for site in metrics.as_dict()["per_site"]]
+    expected = {host : spec.domain_mail(host) for host in results}
+    with_mail = [host for host in results if expected[host]]
+    found = [host for host in with_mail if expected[host] in results[host]]
+    wrong = [host for host in results if results[host] - {expected[host]}]
+
+    print(f"sites            {len(results)}")
+    print(f"elapsed          {elapsed:.2f}s")
+    print(f"throughput       {len(results) / elapsed:.2f} sites/s, "
+            f"{sum(fetches) / elapsed:.1f} fetches/s")
+    print(f"fetches per site mean {statistics.mean(fetches):.1f}, "
+            f"median {statistics.median(fetches):.1f}, max {max(fetches)}")
+    print(f"requests served  {sum(server.requests.values())}")
+    if with_mail:
+        print(f"recall           {len(found)}/{len(with_mail)} "
+                f"({100 * len(found) / len(with_mail):.1f}%)")
+    print(f"wrong mails      {len(wrong)} sites")
+    print(f"overruns         {metrics.lifetime_overruns}")
+    print(f"pruned urls      {metrics.pruned_urls}")
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--sites", type=int, default=50)
+    parser.add_argument("--mode", choices=["site", "file"], default="site",
+            help="Explore with Site.find_mail, or CrawlEngine "
+            "(parse_radio_file)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("--fanout", type=int, default=8)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=20000,
+            metavar="bytes")
+    parser.add_argument("--latency", type=float, default=0.02,
+            metavar="seconds")
+    parser.add_argument("--jitter", type=float, default=0.01,
+            metavar="seconds")
+    parser.add_argument("--dead-links", type=float, default=0.1,
+            metavar="ratio")
+    parser.add_argument("--redirects", type=float, default=0.1,
+            metavar="ratio")
+    parser.add_argument("--contact-depth", type=int, default=2,
+            help="Depth of the contact page, 0 on the homepage, "
+            "-1 without contact")
+    parser.add_argument("--opaque-contact", action="store_true",
+            default=False, help="Contact page without contact keyword")
+    parser.add_argument("--calendar", type=int, default=0,
+            help="Links of each page to an endless calendar")
+    parser.add_argument("--keep-duplicates", action="store_true",
+            default=False, help="Don't prune near duplicate pages")
+    parser.add_argument("--lifetime", type=int, default=Site.LIFETIME,
+            metavar="seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    spec = SiteSpec(args.fanout, args.depth, args.page_size, args.latency,
+            args.jitter, args.dead_links, args.redirects, args.contact_depth,
+            not args.opaque_contact, args.calendar, args.seed)
+    server = SyntheticServer(spec).start()
+    #Every site is reached through the synthetic server
+    get_session().proxies.update({"http" : server.url})
+    Site.LIFETIME = args.lifetime
+    Site.PRUNE_TEMPLATES = not args.keep_duplicates
+
+    hosts = [f"radio{index}.test" for index in range(args.sites)]
+    explore = explore_sites if args.mode == "site" else explore_file
+    start = time.perf_counter()
+    #Silence progress prints of the scanner
+    with contextlib.redirect_stdout(io.StringIO()):
+        results, metrics = explore(hosts, args.concurrency)
+    elapsed = time.perf_counter() - start
+
+    report(spec, results, metrics, elapsed, server)
+    server.shutdown()
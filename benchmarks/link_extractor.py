@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Compare scanner.link.extract_links with the reference LinkParser,
+and scanner.analyzer.find_emails with MAIL_REGEX.findall.
+
+Check first that both return the same links and mails for every
+page of benchmarks/corpus, then time them on the corpus and on
+a large generated page.
+"""
+from argparse import ArgumentParser
+import os
+import sys
+import timeit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from scanner.analyzer import MAIL_REGEX, find_emails
+from scanner.link import LinkParser, extract_links
+
+CORPUS_DIR = os.path.join(BENCH_DIR, "corpus")
+
+
+def load_corpus():
+    """
+    Retrieve all html pages of the corpus, as {name : content}.
+    """
+    corpus = {}
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        with open(os.path.join(CORPUS_DIR, name), encoding="utf8") as page:
+            corpus[name] = page.read()
+    return corpus
+
+def large_page(blocks=2000):
+    """
+    Generate a CMS like page, with many tags and links.
+    """
+    block = """
+<div class="post" id="post-{0}">
+  <h2><a href="/archive/2020/{0}/" title="Post {0}">Post number {0}</a></h2>
+  <p class="meta">By <a href='/author/{1}'>author {1}</a> &middot; 3 comments</p>
+  <p>Lorem ipsum <em>dolor</em> sit amet, <strong>consectetur</strong>
+  adipiscing elit <img src="/img/{0}.jpg" alt="image {0}"> sed do.</p>
+  <!-- tracking {0} -->
+  <a href=/tag/{1} class=tag>tag {1}</a>
+</div>"""
+    content = "".join(block.format(index, index % 17) for index in range(blocks))
+    return f"<html><body>{content}</body></html>"
+
+def check_equivalence(corpus):
+    """
+    Print differences between both parsers, return True
+    when results are identical.
+    """
+    identical = True
+    for name, content in corpus.items():
+        expected = LinkParser().parse_links(content)
+        result = extract_links(content)
+        if result != expected:
+            identical = False
+            print(f"MISMATCH {name}")
+            print(f"  LinkParser    : {expected}")
+            print(f"  extract_links : {result}")
+        elif set(MAIL_REGEX.findall(content)) != find_emails(content):
+            identical = False
+            print(f"MISMATCH {name} (mails)")
+        else:
+            print(f"ok       {name} ({len(result)} links)")
+    return identical
+
+def benchmark(pages, repeat):
+    """
+    Time both parsers on each page, print durations in ms.
+    """
+    print(f"\n{'page':<24}{'size':>10}{'LinkParser':>14}"
+            f"{'extract_links':>16}{'speedup':>10}")
+    for name, content in pages.items():
+        reference = min(timeit.repeat(
+            lambda: LinkParser().parse_links(content),
+            number=1, repeat=repeat))
+        fast = min(timeit.repeat(lambda: extract_links(content),
+            number=1, repeat=repeat))
+        print(f"{name:<24}{len(content):>10}{reference * 1000:>12.3f}ms"
+                f"{fast * 1000:>14.3f}ms{reference / fast:>9.1f}x")
+
+    print(f"\n{'page':<24}{'size':>10}{'MAIL_REGEX':>14}"
+            f"{'find_emails':>16}{'speedup':>10}")
+    for name, content in pages.items():
+        reference = min(timeit.repeat(
+            lambda: set(MAIL_REGEX.findall(content)),
+            number=1, repeat=repeat))
+        fast = min(timeit.repeat(lambda: find_emails(content),
+            number=1, repeat=repeat))
+        print(f"{name:<24}{len(content):>10}{reference * 1000:>12.3f}ms"
+                f"{fast * 1000:>14.3f}ms{reference / fast:>9.1f}x")
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--repeat", type=int, default=20,
+            help="Number of timing runs, best one is kept")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    if not check_equivalence(corpus):
+        sys.exit(1)
+
+    pages = dict(corpus)
+    pages["generated (large)"] = large_page()
+    benchmark(pages, args.repeat)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Local HTTP server generating synthetic radio websites.
+
+The server is used as http proxy, so each site has its own host
+name (radio0.test, radio1.test...) without any DNS. Every page is
+generated from the site name and the path, always identically:
+- pages form a tree of `fanout` links per page, `depth` levels deep
+- a contact page holds the domain mail, linked at `contact_depth`
+  (0 for a mail on the homepage, -1 for a site without mail)
+- links can be dead (404) or redirections to an other page
+- pages are padded to `page_size` bytes, and served after
+  `latency` seconds, +/- `jitter`
+- each page links to `calendar` pages of an endless calendar,
+  all built from the same template
+"""
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import datetime
+import random
+import sys
+import threading
+import time
+import urllib.parse as URLParse
+
+#Names of child pages, without contact related keywords
+SEGMENTS = ["news", "shows", "music", "events", "podcasts", "live",
+        "charts", "weather", "sports", "traffic", "culture", "local",
+        "games", "videos", "photos", "blog"]
+FILLER = ("Your favourite hits all day long, news at every hour, "
+        "traffic and weather. Listen live on our player. ")
+
+
+def segment(index):
+    """
+    Path segment of the index-th child of a page.
+    """
+    word = SEGMENTS[index % len(SEGMENTS)]
+    if index < len(SEGMENTS):
+        return word
+    return word + "-" + chr(ord("a") + index // len(SEGMENTS) - 1)
+
+
+class SiteSpec:
+    """
+    Shape of the generated websites.
+    """
+    def __init__(self, fanout=8, depth=3, page_size=20000, latency=0.02,
+            jitter=0.01, dead_links=0.1, redirects=0.1, contact_depth=2,
+            contact_keyword=True, calendar=0, seed=0):
+        self.fanout = fanout
+        self.depth = depth
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.dead_links = dead_links
+        self.redirects = redirects
+        self.contact_depth = contact_depth
+        self.contact_keyword = contact_keyword
+        self.calendar = calendar
+        self.seed = seed
+
+    def domain_mail(self, host):
+        """
+        Mail expected to be found on a site, None without contact.
+        """
+        if self.contact_depth < 0:
+            return None
+        return f"contact@{host}"
+
+
+class SyntheticSite:
+    """
+    Pages of a single generated website.
+    """
+    def __init__(self, host, spec):
+        self.host = host
+        self.spec = spec
+        self.random = random.Random(f"{spec.seed}:{host}")
+        #Parent page of the contact page, a random branch of the tree
+        self.contact_parent = "/" + "/".join(segment(self.random.randrange( \
+                spec.fanout)) for _ in range(max(0, spec.contact_depth - 1)))
+        self.segments = {segment(index) for index in range(spec.fanout)}
+        self.contact_path = self.contact_parent.rstrip("/") + \
+                ("/contact-us" if spec.contact_keyword else "/page-x")
+
+    def _children(self, path):
+        parts = [part for part in path.split("/") if part]
+        if len(parts) >= self.spec.depth:
+            return []
+        base = path.rstrip("/")
+        return [f"{base}/{segment(index)}" for index in \
+                range(self.spec.fanout)]
+
+    def _links(self, path):
+        """
+        Links of a page, some of them dead or redirected.
+        """
+        page_random = random.Random(f"{self.spec.seed}:{self.host}:{path}")
+        links = []
+        for child in self._children(path):
+            draw = page_random.random()
+            #Keep the contact page reachable
+            if (self.contact_parent + "/").startswith(child + "/"):
+                links.append((child, f"Show {child}"))
+            elif draw < self.spec.dead_links:
+                links.append((child + "-dead", f"Article {child}"))
+            elif draw < self.spec.dead_links + self.spec.redirects:
+                links.append(("/redirect" + child, f"Show {child}"))
+            else:
+                links.append((child, f"Show {child}"))
+        if self.spec.contact_depth > 0 and path == self.contact_parent:
+            text = "Contact us" if self.spec.contact_keyword else "More"
+            links.append((self.contact_path, text))
+        links += self._calendar_links(page_random)
+        return links
+
+    def _calendar_links(self, page_random):
+        """
+        Links to random days of the calendar.
+        """
+        start = datetime.date(2000, 1, 1)
+        days = [start + datetime.timedelta(page_random.randrange(10000)) \
+                for _ in range(self.spec.calendar)]
+        return [(f"/calendar/{day.isoformat()}", f"Programs of {day}") \
+                for day in days]
+
+    def _calendar_page(self, path):
+        """
+        Programs of a day, with links to other days.
+        """
+        page_random = random.Random(f"{self.spec.seed}:{self.host}:{path}")
+        content = ["<html><head><title>Programs</title></head><body><nav>"]
+        for href, text in self._calendar_links(page_random):
+            content.append(f'<a href="{href}">{text}</a> ')
+        content.append("</nav><main><table>")
+        for hour in range(24):
+            show = page_random.choice(["Morning show", "News", "Top 40",
+                    "Jazz night", "Talk"])
+            content.append(f'<tr class="slot"><td class="hour">{hour}:00</td>'
+                    f'<td class="show">{show}</td></tr>')
+        content.append("</table></main></body></html>")
+        return 200, {"Content-Type" : "text/html; charset=utf-8"}, \
+                "".join(content).encode("utf8")
+
+    def page(self, path):
+        """
+        Retrieve (status, headers, body) of a path.
+        """
+        if path.startswith("/redirect/"):
+            return 301, {"Location" : path[len("/redirect"):]}, b""
+        if path.startswith("/calendar/") and self.spec.calendar:
+            return self._calendar_page(path)
+        parts = [part for part in path.split("/") if part]
+        is_contact = path == self.contact_path and self.spec.contact_depth > 0
+        valid = all(part in self.segments for part in parts) and \
+                len(parts) <= self.spec.depth
+        if not is_contact and not valid:
+            return 404, {}, b"<html><body>Not found</body></html>"
+
+        content = [f"<html><head><title>{self.host}{path}</title></head>"
+                "<body><nav>"]
+        for href, text in self._links(path):
+            content.append(f'<a href="{href}">{text}</a> ')
+        content.append("</nav><main>")
+        mail = self.spec.domain_mail(self.host)
+        if is_contact or (mail and self.spec.contact_depth == 0 \
+                and path == "/"):
+            content.append(f'Write to <a href="mailto:{mail}">{mail}</a>')
+        elif parts == [segment(1)]:
+            #Mail not related to the site domain
+            content.append("Our partner: partner@agency.example.com")
+        filler_size = self.spec.page_size - sum(map(len, content))
+        content.append("<p>" + FILLER * max(0, filler_size // len(FILLER)) \
+                + "</p></main></body></html>")
+        return 200, {"Content-Type" : "text/html; charset=utf-8"}, \
+                "".join(content).encode("utf8")
+
+
+class SyntheticHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        url = URLParse.urlsplit(self.path)
+        host = url.hostname or self.headers.get("Host", "").split(":")[0]
+        path = url.path or "/"
+        site = server.site(host)
+
+        delay = server.spec.latency + random.uniform(-server.spec.jitter,
+                server.spec.jitter)
+        time.sleep(max(0, delay))
+
+        status, headers, body = site.page(path)
+        server.count_request(host)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args, **kwargs):
+        pass
+
+
+class SyntheticServer(ThreadingHTTPServer):
+    """
+    Threaded server of synthetic sites, counting requests by host.
+    """
+    daemon_threads = True
+
+    def __init__(self, spec, address=("127.0.0.1", 0)):
+        super().__init__(address, SyntheticHandler)
+        self.spec = spec
+        self.requests = {}
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return "http://{}:{}".format(*self.server_address)
+
+    def site(self, host):
+        with self._lock:
+            if host not in self._sites:
+                self._sites[host] = SyntheticSite(host, self.spec)
+            return self._sites[host]
+
+    def handle_error(self, request, client_address):
+        #Crawlers drop connections of abandoned fetches
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def count_request(self, host):
+        with self._lock:
+            self.requests[host] = self.requests.get(host, 0) + 1
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    server = SyntheticServer(SiteSpec(), ("127.0.0.1", args.port))
+    print(f"Serving synthetic radio sites, use {server.url} as http proxy")
+    server.serve_forever()
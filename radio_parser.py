@@ -1,8 +1,20 @@
 #!/usr/bin/env python3
 
+from scanner.analyzer import configure_analysis
+from scanner.crawler import CrawlEngine
+from scanner.health import SiteHealth
+from scanner.cache import ResponseCache
 from scanner.logger import LogRadio
+from scanner.metrics import CrawlMetrics, MetricsWriter
+from scanner.ratelimit import RateLimiter
+from scanner.resolver import DnsCache, configure_dns
+from scanner.session import configure_session, configure_cache, \
+        configure_rate_limit, POOL_MAXSIZE
 from scanner.site import Site
+from scanner.storage import RadioDatabase
+from scanner.worker import CrawlWorker
 from wikipedia.controller import SearchController
+from wikipedia.mediawiki import MediaWikiClient, API_URL
 from wikipedia.page import PageInfo
 from argparse import ArgumentParser
 from workdir import WorkingDirectory
@@ -31,6 +43,16 @@ and parse them to find contact email."""
             help="csv file of radio list")
     group.add_argument("-s", "--site", metavar="site",
             help="Search email in the given site")
+    group.add_argument("--db-export", metavar="basename",
+            help="Export the --db database in basename.template "
+            "and basename.csv")
+    group.add_argument("--enqueue", metavar="filename",
+            help="Add radios of a .template file to the --db work queue")
+    group.add_argument("--worker", action="store_true", default=False,
+            help="Explore radios leased from the --db work queue")
+    group.add_argument("--merge", metavar="filename",
+            help="Write the .csv of a .template file with results "
+            "of the --db work queue")
 
     parser.add_argument("-v", "--verbose",
             action="store_true", default=False)
@@ -41,31 +63,132 @@ and parse them to find contact email."""
     parser.add_argument("-l", "--lang",
             default="en", metavar="wiki-language",
             help="Select wikipedia's lang")
+    parser.add_argument("--wiki-api", default=API_URL, metavar="url",
+            help="MediaWiki API url, {lang} is replaced by --lang")
+
+    parser.add_argument("-c", "--concurrency", type=int,
+            default=CrawlEngine.DEFAULT_CONCURRENCY, metavar="N",
+            help="Number of radio sites explored at the same time")
+    parser.add_argument("--resume", action="store_true", default=False,
+            help="With --csv, skip radios explored by an interrupted run")
+    parser.add_argument("--max-run-time", type=int, metavar="seconds",
+            help="Time limit of the whole radio sites exploration")
+    parser.add_argument("--pool-size", type=int,
+            default=POOL_MAXSIZE, metavar="N",
+            help="Connections kept alive for a single host")
+    parser.add_argument("--max-page-size", type=int,
+            default=Site.MAX_PAGE_SIZE // 1024, metavar="KB",
+            help="Maximum size read from a single page")
+    parser.add_argument("--frontier-size", type=int,
+            default=Site.FRONTIER_SIZE, metavar="N",
+            help="Maximum urls waiting to be explored on a site, "
+            "the least promising ones are dropped")
+    parser.add_argument("--keep-duplicates", action="store_true",
+            default=False, help="Keep exploring url patterns of near "
+            "duplicate pages (calendars, playlists, pagination...)")
+    parser.add_argument("--analysis-processes", type=int,
+            default=0, metavar="N",
+            help="Analyze pages in N processes, 0 to analyze in crawl threads")
+
+    parser.add_argument("--sitemap", action="store_true", default=False,
+            help="Read robots.txt and sitemaps of radio sites to find "
+            "contact pages, and respect robots.txt rules")
+    parser.add_argument("--host-rate", type=float,
+            default=RateLimiter.DEFAULT_HOST_RATE, metavar="N",
+            help="Maximum requests per second to a host, 0 for no limit")
+    parser.add_argument("--ip-rate", type=float,
+            default=RateLimiter.DEFAULT_IP_RATE, metavar="N",
+            help="Maximum requests per second to an IP address, "
+            "0 for no limit")
+    parser.add_argument("--global-rate", type=float,
+            default=RateLimiter.DEFAULT_GLOBAL_RATE, metavar="N",
+            help="Maximum requests per second of the whole run, "
+            "0 for no limit")
+
+    parser.add_argument("--dns-ttl", type=int,
+            default=DnsCache.DEFAULT_TTL, metavar="seconds",
+            help="Duration a resolved host is cached, 0 to disable "
+            "the DNS cache")
+    parser.add_argument("--dns-negative-ttl", type=int,
+            default=DnsCache.DEFAULT_NEGATIVE_TTL, metavar="seconds",
+            help="Duration an unknown host is cached")
+
+    parser.add_argument("--health", metavar="filename",
+            help="Database of failing sites, skipped in later runs")
+    parser.add_argument("--health-ttl", type=int,
+            default=SiteHealth.DEFAULT_TTL, metavar="seconds",
+            help="Duration a failing site is skipped, doubled at each "
+            "consecutive failure")
+
+    parser.add_argument("--metrics", metavar="basename",
+            help="Write crawl metrics in basename.json and basename.prom "
+            "(Prometheus text format)")
+    parser.add_argument("--metrics-interval", type=int,
+            default=MetricsWriter.DEFAULT_INTERVAL, metavar="seconds",
+            help="Delay between two writes of metrics during the run")
+
+    parser.add_argument("--db", metavar="filename",
+            help="SQLite database storing radios and scan results")
+    parser.add_argument("--db-no-wal", action="store_true", default=False,
+            help="Use a rollback journal, for a database shared between "
+            "machines on a network filesystem")
+
+    parser.add_argument("--cache", metavar="dir",
+            help="Directory of the on-disk cache of fetched pages")
+    parser.add_argument("--cache-ttl", type=int,
+            default=ResponseCache.DEFAULT_TTL, metavar="seconds",
+            help="Duration a cached page is used without revalidation")
+    parser.add_argument("--cache-size", type=int,
+            default=ResponseCache.DEFAULT_MAX_SIZE // (1024 * 1024),
+            metavar="MB", help="Maximum size of the page cache")
 
     args = parser.parse_args()
+    for option, name in [(args.db_export, "--db-export"),
+            (args.enqueue, "--enqueue"), (args.worker, "--worker"),
+            (args.merge, "--merge")]:
+        if option and not args.db:
+            parser.error(f"{name} requires --db")
 
     VERBOSE = args.verbose
     return parser.parse_args()
 
-def parse_radio_file(wikilist_file):
+def parse_radio_file(wikilist_file, concurrency=1, lang="en", resume=False,
+        database=None, max_run_time=None, health=None, metrics_file=None,
+        metrics_interval=MetricsWriter.DEFAULT_INTERVAL):
     """
     Parse csv file containing radio listing, and retrieve
     contact email on radios' website.
+
+    Explore up to `concurrency` radio websites at the same time,
+    looking for contact pages written in `lang`.
+
+    With `resume`, radios already explored by an interrupted run
+    are restored from the scan journal.
+
+    Radios and results are also stored in the RadioDatabase `database`.
+
+    With `max_run_time`, the exploration is limited to this
+    number of seconds.
+
+    Sites failing in previous runs are skipped with the SiteHealth `health`.
+
+    Crawl metrics are written in `metrics_file`.json and .prom every
+    `metrics_interval` seconds, and at the end of the run.
     """
     #Prepare record file
     log_file = LogRadio(wikilist_file)
-    for section in log_file.radio_dataset:
-
-        #Go through each radio of a section, and explore radio site
-        for radio_info in log_file.radio_dataset[section]:
-            site = Site(radio_info.site)
-            site.find_mail()
-            radio_info.update_mails(site.domain_mails, site.unsure_mails)
+    metrics = CrawlMetrics() if metrics_file else None
+    engine = CrawlEngine(log_file, concurrency, lang, resume, database,
+            max_run_time, health, metrics)
+    if metrics is None:
+        engine.run()
+        return None
+    with MetricsWriter(metrics, metrics_file, metrics_interval):
+        engine.run()
 
-        #Save at each explored section
-        log_file.save()
-
-def parse_wiki_list(wikilist_page, lang, workdir):
+def parse_wiki_list(wikilist_page, lang, workdir, concurrency=1,
+        database=None, max_run_time=None, health=None, metrics_file=None,
+        metrics_interval=MetricsWriter.DEFAULT_INTERVAL, wiki_api=API_URL):
     """
     Parse wikipedia page, mainly "List of radio stations in ..."
     like page.
@@ -74,37 +197,120 @@ def parse_wiki_list(wikilist_page, lang, workdir):
         - List of radio stations in the United Kingdom
         - Category:Lists of radio stations by country
 
-    Search website in wiki infobox for each radio of this listing.
+    Search website in wiki infobox for each radio of this listing,
+    with pages fetched by batches from the `wiki_api` MediaWiki API.
     Store founded website in .template (=csv format) file,
     and use parse_radio_file to explore each radio website.
     """
     silent = VERBOSE == False
     with WorkingDirectory(workdir):
-        wikisearch = SearchController(wikilist_page, lang, silent=silent)
+        wikisearch = SearchController(wikilist_page, lang, silent=silent,
+                client=MediaWikiClient(lang, wiki_api))
         wikisearch.launch()
-        parse_radio_file(wikisearch.filename)
+        parse_radio_file(wikisearch.filename, concurrency, lang,
+                database=database, max_run_time=max_run_time, health=health,
+                metrics_file=metrics_file, metrics_interval=metrics_interval)
 
-def parse_radio_site(url):
+def parse_radio_site(url, lang="en"):
     """
     Retrieve emails from a single website, print them on stdout.
     """
-    site = Site(url)
+    site = Site(url, lang)
     site.find_mail()
     print("Domain mail : {}".format(site.domain_mails))
     print("unknow mail : {}".format(site.unsure_mails))
 
-def parse_radio_wiki(radio_name, lang):
-    page = PageInfo(radio_name, lang, silent=VERBOSE==False)
+def export_database(database, basename):
+    """
+    Write radios of the database in basename.template, and
+    radios with mails in basename.csv.
+    """
+    database.export_template(basename + ".template")
+    database.export_csv(basename + ".csv")
+    missing = len(database.radios_without_mails())
+    print(f"{missing} radios without mail in '{database.filename}'")
+
+def enqueue_radio_file(database, wikilist_file):
+    """
+    Add radios of a .template file to the work queue of the database,
+    to be explored by workers (see run_worker).
+    """
+    database.import_template(wikilist_file)
+    print(f"{database.pending_count()} radios to explore in "
+            f"'{database.filename}'")
+
+def run_worker(database, concurrency=1, lang="en", metrics_file=None,
+        metrics_interval=MetricsWriter.DEFAULT_INTERVAL, health=None,
+        max_run_time=None):
+    """
+    Explore radios of the database work queue, with other workers
+    possibly running on other machines sharing the database.
+    """
+    metrics = CrawlMetrics() if metrics_file else None
+    worker = CrawlWorker(database, concurrency, lang, metrics=metrics,
+            health=health, max_run_time=max_run_time)
+    if metrics is None:
+        explored = worker.run()
+    else:
+        with MetricsWriter(metrics, metrics_file, metrics_interval):
+            explored = worker.run()
+    print(f"{explored} radios explored by this worker")
+
+def merge_radio_file(database, wikilist_file):
+    """
+    Write the .csv of a .template file, with results stored
+    in the database by workers.
+    """
+    log_file = LogRadio(wikilist_file)
+    database.restore(log_file.radio_dataset)
+    log_file.save()
+    pending = database.pending_count()
+    if pending:
+        print(f"{pending} radios still to explore in '{database.filename}'")
+
+def parse_radio_wiki(radio_name, lang, wiki_api=API_URL):
+    page = PageInfo(radio_name, lang, silent=VERBOSE==False,
+            client=MediaWikiClient(lang, wiki_api))
     print(f"Site of '{radio_name}' : {page.radio_site}")
 
 if __name__ == "__main__":
     ARGS = get_options()
+    configure_session(pool_maxsize=ARGS.pool_size)
+    configure_analysis(ARGS.analysis_processes)
+    if ARGS.dns_ttl > 0:
+        configure_dns(DnsCache(ARGS.dns_ttl, ARGS.dns_negative_ttl))
+    configure_rate_limit(RateLimiter(ARGS.host_rate, ARGS.ip_rate,
+        ARGS.global_rate))
+    Site.MAX_PAGE_SIZE = ARGS.max_page_size * 1024
+    Site.FRONTIER_SIZE = ARGS.frontier_size
+    Site.PRUNE_TEMPLATES = not ARGS.keep_duplicates
+    Site.USE_SITEMAP = ARGS.sitemap
+    if ARGS.cache:
+        configure_cache(ResponseCache(ARGS.cache, ARGS.cache_ttl,
+            ARGS.cache_size * 1024 * 1024))
+    DATABASE = RadioDatabase(ARGS.db, not ARGS.db_no_wal) if ARGS.db \
+            else None
+    HEALTH = SiteHealth(ARGS.health, ARGS.health_ttl) if ARGS.health \
+            else None
     if ARGS.wiki_title:
-        parse_wiki_list(ARGS.wiki_title, ARGS.lang, ARGS.workdir)
+        parse_wiki_list(ARGS.wiki_title, ARGS.lang, ARGS.workdir,
+                ARGS.concurrency, DATABASE, ARGS.max_run_time, HEALTH,
+                ARGS.metrics, ARGS.metrics_interval, ARGS.wiki_api)
     elif ARGS.csv:
-        parse_radio_file(ARGS.csv)
+        parse_radio_file(ARGS.csv, ARGS.concurrency, ARGS.lang,
+                ARGS.resume, DATABASE, ARGS.max_run_time, HEALTH,
+                ARGS.metrics, ARGS.metrics_interval)
+    elif ARGS.db_export:
+        export_database(DATABASE, ARGS.db_export)
+    elif ARGS.enqueue:
+        enqueue_radio_file(DATABASE, ARGS.enqueue)
+    elif ARGS.worker:
+        run_worker(DATABASE, ARGS.concurrency, ARGS.lang, ARGS.metrics,
+                ARGS.metrics_interval, HEALTH, ARGS.max_run_time)
+    elif ARGS.merge:
+        merge_radio_file(DATABASE, ARGS.merge)
     elif ARGS.site:
-        parse_radio_site(ARGS.site)
+        parse_radio_site(ARGS.site, ARGS.lang)
     elif ARGS.radio_wiki:
-        parse_radio_wiki(ARGS.radio_wiki, ARGS.lang)
+        parse_radio_wiki(ARGS.radio_wiki, ARGS.lang, ARGS.wiki_api)
 
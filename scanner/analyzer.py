@@ -0,0 +1,126 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import re
+import threading
+import urllib.parse as URLParse
+
+from .duplicate import page_sketch
+from .link import extract_links
+from .url import same_host
+
+MAIL_REGEX = "[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"
+MAIL_REGEX = re.compile(MAIL_REGEX)
+#Parts of MAIL_REGEX around the '@'
+MAIL_LOCAL_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        "abcdefghijklmnopqrstuvwxyz0123456789._%+-")
+MAIL_DOMAIN_REGEX = re.compile(r"[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+
+#Result of a page analysis:
+#- links: list of (href, anchor text), without mailto links
+#- mailto: mails targeted by mailto links
+#- emails: all mail like elements of the page, mailto ones included
+#- sketch: structure of the page, see page_sketch
+PageAnalysis = namedtuple("PageAnalysis", ["links", "mailto", "emails",
+        "sketch"])
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def find_emails(html_content):
+    """
+    Find all emails within an html page, as MAIL_REGEX.findall
+    would, but matching only around '@' characters instead of
+    trying the regex at each position of the page.
+    """
+    emails = set()
+    last_end = 0
+    at = html_content.find("@")
+    while at != -1:
+        #Local part: MAIL_LOCAL_CHARS before the '@', not overlapping
+        #the previous mail
+        start = at
+        while start > last_end and html_content[start - 1] in MAIL_LOCAL_CHARS:
+            start -= 1
+        domain = MAIL_DOMAIN_REGEX.match(html_content, at + 1) \
+                if start < at else None
+        if domain:
+            emails.add(html_content[start:domain.end()])
+            last_end = domain.end()
+            at = html_content.find("@", last_end)
+        else:
+            at = html_content.find("@", at + 1)
+    return emails
+
+def retrieve_email(html_content):
+    """
+    Find all emails within an html page.
+    """
+    return find_emails(html_content)
+
+def mailto_targets(href):
+    """
+    Retrieve mails of a mailto: href, without its parameters.
+    """
+    targets = URLParse.unquote(href[len("mailto:"):]).split("?")[0]
+    return {mail.strip() for mail in targets.split(",") \
+            if MAIL_REGEX.fullmatch(mail.strip())}
+
+def analyze_page(html_content, page_url=None):
+    """
+    Extract from an html page, in a single pass over links:
+    - href of <a> elements with their anchor text, only links
+      to the host of `page_url` when given
+    - mails of mailto: links
+    - all mail like elements of the page
+    - sketch of the page structure, to find near duplicates
+
+    return: PageAnalysis
+    """
+    links, mailto = [], set()
+    for href, text in extract_links(html_content):
+        if href[:7].lower() == "mailto:":
+            mailto |= mailto_targets(href)
+        elif page_url is None or _is_internal(href, page_url):
+            links.append((href, text))
+    emails = find_emails(html_content) | mailto
+    return PageAnalysis(links, mailto, emails, page_sketch(html_content))
+
+def _is_internal(href, page_url):
+    """
+    Check if a link, possibly relative, points to the page host.
+    Malformed links (invalid IPv6 host...) are dropped.
+    """
+    try:
+        parsed_url = URLParse.urlsplit(href.strip())
+        if not parsed_url.netloc:
+            return parsed_url.scheme in ["", "http", "https"]
+        return parsed_url.scheme in ["", "http", "https"] and \
+                same_host(parsed_url.netloc,
+                        URLParse.urlsplit(page_url).netloc)
+    except ValueError:
+        return False
+
+def configure_analysis(processes):
+    """
+    Run page analysis in a pool of `processes` processes,
+    or in the calling thread when `processes` is 0.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(processes) if processes else None
+
+def analyze(html_content, page_url=None):
+    """
+    Analyze a page in the process pool when configured, otherwise
+    in the calling thread. Same result as analyze_page.
+
+    Html parsing is CPU bound, offloading it to processes lets
+    concurrent crawls scale with the number of cores.
+    """
+    pool = _pool
+    if pool is None:
+        return analyze_page(html_content, page_url)
+    return pool.submit(analyze_page, html_content, page_url).result()
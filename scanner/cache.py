@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .url import canonical_url
+
+
+class CacheEntry:
+    """
+    Single cached response, with validators used for
+    conditional requests.
+    """
+    def __init__(self, url, status, body, etag=None, last_modified=None,
+            stored=None):
+        self.url = url
+        self.status = status
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored = stored if stored is not None else time.time()
+
+    def is_fresh(self, ttl):
+        return time.time() - self.stored < ttl
+
+    def validators(self):
+        """
+        Headers to revalidate the entry with a conditional request.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def as_dict(self):
+        return {
+            "url" : self.url,
+            "status" : self.status,
+            "body" : self.body,
+            "etag" : self.etag,
+            "last_modified" : self.last_modified,
+            "stored" : self.stored,
+            }
+
+
+class ResponseCache:
+    """
+    On-disk cache of fetched pages, shared between runs.
+
+    Each entry is a json file named by the hash of the canonical
+    url. Entries younger than `ttl` are used without any request,
+    older ones are revalidated with ETag/Last-Modified.
+
+    When the cache grows over `max_size` bytes, least recently
+    used entries are removed.
+    """
+    DEFAULT_TTL = 7 * 24 * 3600
+    DEFAULT_MAX_SIZE = 500 * 1024 * 1024
+
+    def __init__(self, directory, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        self._size = sum(os.path.getsize(path) for path in self._entries())
+
+    def _entries(self):
+        return [os.path.join(self.directory, name) for name in \
+                os.listdir(self.directory) if name.endswith(".json")]
+
+    def _path(self, url):
+        key = hashlib.sha1(canonical_url(url).encode("utf8")).hexdigest()
+        return os.path.join(self.directory, key + ".json")
+
+    def lookup(self, url):
+        """
+        Retrieve the CacheEntry of an url, None when not cached.
+        """
+        path = self._path(url)
+        try:
+            with open(path, "r", encoding="utf8") as entry_file:
+                entry = CacheEntry(**json.load(entry_file))
+        except (OSError, ValueError, TypeError):
+            return None
+        #Mark entry as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def store(self, entry):
+        """
+        Write an entry on disk, replacing atomically an older one.
+        """
+        path = self._path(entry.url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf8") as entry_file:
+            json.dump(entry.as_dict(), entry_file)
+
+        with self._lock:
+            if os.path.exists(path):
+                self._size -= os.path.getsize(path)
+            os.replace(tmp_path, path)
+            self._size += os.path.getsize(path)
+            if self._size > self.max_size:
+                self._evict()
+
+    def refresh(self, entry):
+        """
+        Entry revalidated by the server, restart its ttl.
+        """
+        entry.stored = time.time()
+        self.store(entry)
+
+    def _evict(self):
+        """
+        Remove least recently used entries until the cache
+        is back under 90% of max_size.
+        """
+        entries = []
+        for path in self._entries():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        self._size = sum(size for _, size, _ in entries)
+        limit = self.max_size * 0.9
+        for _, size, path in entries:
+            if self._size <= limit:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            self._size -= size
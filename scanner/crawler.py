@@ -0,0 +1,267 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import sys
+import threading
+import time
+
+from .errors import failure_class
+from .health import site_key
+from .journal import ScanJournal
+from .resolver import get_dns_cache
+from .site import Site
+from .url import parse_site
+
+
+class CrawlEngine:
+    """
+    Explore radio websites of a LogRadio file concurrently.
+
+    Run up to `concurrency` Site crawls at once with a pool
+    of workers. Each crawl is mostly waiting on the network,
+    so threads are enough to keep many sites in progress.
+
+    Results are merged into the RadioInfo of LogRadio.radio_dataset,
+    and the logfile is saved each time all radios of a section
+    are explored.
+
+    Each explored radio is also written in a ScanJournal, used
+    with `resume` to skip radios explored by a previous run.
+
+    With a RadioDatabase, radios of the logfile and results of
+    each explored site (mails, fetched pages, error) are stored
+    in the database too.
+
+    With `max_run_time`, the whole run is limited to this number of
+    seconds: each site gets a fair share of the remaining time, up to
+    Site.LIFETIME, and radios not started when it runs out are left
+    unexplored (and explored by a resumed run).
+
+    When a DnsCache is configured, hosts of all radios are resolved
+    before the crawl, and radios of domains which don't exist are
+    recorded as failed without being explored.
+
+    With a SiteHealth, sites which failed in previous runs are skipped
+    during their backoff delay, and explored last once retried.
+
+    Metrics of each explored site are added to a CrawlMetrics.
+    """
+    DEFAULT_CONCURRENCY = 8
+
+    def __init__(self, log_file, concurrency=DEFAULT_CONCURRENCY, lang="en",
+            resume=False, database=None, max_run_time=None, health=None,
+            metrics=None):
+        self.log_file = log_file
+        self.concurrency = max(1, concurrency)
+        self.lang = lang
+        self.journal = ScanJournal(log_file.journalfile, resume)
+        self.database = database
+        self.max_run_time = max_run_time
+        self.health = health
+        self.metrics = metrics
+        self._deadline = None
+        #Radios not yet started, to share the remaining run time
+        self._unstarted = 0
+        self._lock = threading.Lock()
+
+    def run(self):
+        """
+        Launch the crawl of each radio site, save the logfile
+        as soon as a section is entirely explored.
+        """
+        dataset = self.log_file.radio_dataset
+        #Number of radios still in progress for each section
+        pending = {section:0 for section in dataset}
+
+        to_explore = []
+        for section in dataset:
+            for radio_info in dataset[section]:
+                #Explored by a previous run
+                if self.journal.restore(section, radio_info):
+                    continue
+                to_explore.append((section, radio_info))
+                pending[section] += 1
+
+        #Store radios with mails restored from the journal
+        if self.database is not None:
+            self.database.import_dataset(dataset)
+
+        to_explore = self._check_health(to_explore, pending)
+
+        #Radios of unknown domains fail without any request
+        dead_hosts = self._prefetch_hosts(to_explore)
+        if dead_hosts:
+            alive = []
+            for section, radio_info in to_explore:
+                if self._host(radio_info) in dead_hosts:
+                    self._record_dead(section, radio_info)
+                    pending[section] -= 1
+                else:
+                    alive.append((section, radio_info))
+            to_explore = alive
+
+        self._unstarted = len(to_explore)
+        if self.max_run_time is not None:
+            self._deadline = time.perf_counter() + self.max_run_time
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {}
+            for section, radio_info in to_explore:
+                future = pool.submit(self._explore, section, radio_info)
+                futures[future] = section
+
+            for future in as_completed(futures):
+                section = futures[future]
+                future.result()
+                pending[section] -= 1
+                #Save at each explored section
+                if pending[section] == 0:
+                    self.log_file.save()
+
+        #Sections without any radio to explore are never saved in the loop
+        self.log_file.save()
+        self.journal.close()
+
+    @staticmethod
+    def _host(radio_info):
+        try:
+            return (parse_site(radio_info.site).hostname or "").lower()
+        except ValueError:
+            return ""
+
+    def _prefetch_hosts(self, to_explore):
+        """
+        Resolve hosts of radios to explore in the DnsCache.
+        return: set of hosts which don't exist.
+        """
+        dns_cache = get_dns_cache()
+        if dns_cache is None:
+            return set()
+        hosts = {self._host(radio_info) for _, radio_info in to_explore}
+        dead_hosts = dns_cache.prefetch(hosts)
+        print(f"Resolved {len(hosts)} hosts, {len(dead_hosts)} unknown")
+        return dead_hosts
+
+    def _record_dead(self, section, radio_info):
+        """
+        Record a radio with an unknown domain as failed.
+        """
+        print("Skip : ", radio_info.site, "(unknown host)")
+        self.journal.record(section, radio_info, ScanJournal.FAILED)
+        if self.database is not None:
+            self.database.record(section, radio_info, ScanJournal.FAILED,
+                    error="unknown host")
+        if self.health is not None:
+            self.health.record_failure(site_key(radio_info.site),
+                    "UnknownHost")
+
+    def _check_health(self, to_explore, pending):
+        """
+        Remove radios of sites in their failure backoff delay,
+        and move sites which failed before at the end.
+        """
+        if self.health is None:
+            return to_explore
+
+        retried = []
+        healthy = []
+        for section, radio_info in to_explore:
+            key = site_key(radio_info.site)
+            failures = self.health.failures(key)
+            if not failures:
+                healthy.append((section, radio_info))
+            elif self.health.should_skip(key):
+                print("Skip : ", radio_info.site, f"({failures} failures)")
+                pending[section] -= 1
+            else:
+                retried.append((failures, section, radio_info))
+        retried.sort(key=lambda retry: retry[0])
+        return healthy + [(section, radio_info) for _, section, radio_info \
+                in retried]
+
+    def _site_lifetime(self):
+        """
+        Duration allowed to the next site, sharing the time left
+        in the run between radios not yet started: each worker
+        has the remaining time for its share of those radios.
+
+        return: None without run budget, 0 when the run is over.
+        """
+        with self._lock:
+            unstarted = self._unstarted
+            self._unstarted -= 1
+        if self._deadline is None:
+            return None
+
+        remaining = self._deadline - time.perf_counter()
+        if remaining <= 0:
+            return 0
+        share = remaining * min(self.concurrency, unstarted) / unstarted
+        return min(Site.LIFETIME, share)
+
+    def _explore(self, section, radio_info):
+        """
+        Search mails of a single radio, and store them in
+        its RadioInfo.
+        """
+        lifetime = self._site_lifetime()
+        #Run time exhausted, leave the radio for a resumed run
+        if lifetime == 0:
+            print("Skip : ", radio_info.site)
+            return radio_info
+
+        explore_radio(section, radio_info, self.lang, lifetime,
+                journal=self.journal, database=self.database,
+                health=self.health, metrics=self.metrics)
+        return radio_info
+
+
+def explore_radio(section, radio_info, lang="en", lifetime=None,
+        journal=None, database=None, health=None, metrics=None):
+    """
+    Explore the site of a radio and store its mails in its RadioInfo,
+    then record the result in the ScanJournal, RadioDatabase,
+    SiteHealth and CrawlMetrics given.
+
+    A site is explored once at least one of its pages was received.
+    An unexpected error of the exploration fails the radio without
+    stopping the run.
+
+    Sites in their health backoff delay are left unexplored and
+    unrecorded, for a run after their backoff.
+
+    return: ScanJournal status of the radio, None when skipped
+    """
+    key = site_key(radio_info.site)
+    if health is not None and health.should_skip(key):
+        print("Skip : ", radio_info.site, f"({health.failures(key)} failures)")
+        return None
+
+    site = None
+    try:
+        site = Site(radio_info.site, lang, lifetime)
+        site.find_mail()
+        error = site.error
+    except Exception as Error:
+        #A single broken site must not stop the whole run
+        print(f"{radio_info.site}: exploration failed '{Error}'",
+                file=sys.stderr)
+        error = Error
+
+    pages, page_count = (), 0
+    if site is not None:
+        radio_info.update_mails(site.domain_mails, site.unsure_mails)
+        if metrics is not None:
+            metrics.add_site(site.metrics)
+        pages, page_count = site.navigated_url.sample, len(site.navigated_url)
+
+    status = ScanJournal.DONE if site is not None and site.metrics.pages \
+            and not error else ScanJournal.FAILED
+    if health is not None:
+        if error:
+            health.record_failure(key, failure_class(error))
+        elif status == ScanJournal.DONE:
+            health.record_success(key)
+    if journal is not None:
+        journal.record(section, radio_info, status)
+    if database is not None:
+        database.record(section, radio_info, status, pages, error, page_count)
+    return status
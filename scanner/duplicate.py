@@ -0,0 +1,95 @@
+import heapq
+import re
+import zlib
+
+from .url import canonical_url
+
+#Start tags with their class attribute, when any
+STRUCTURE_TAG_REGEX = re.compile(r"""<([a-zA-Z][a-zA-Z0-9]*)"""
+        r"""(?:\s[^>]*?\bclass\s*=\s*["']?([^"'>]*))?""")
+DIGITS_REGEX = re.compile(r"[0-9]+")
+
+#Consecutive tags of a shingle
+SHINGLE_SIZE = 4
+#Shingle hashes kept in a page sketch
+SKETCH_SIZE = 64
+#Resemblance of pages considered as near duplicates
+DUPLICATE_RESEMBLANCE = 0.9
+
+
+def page_sketch(html_content):
+    """
+    Sketch of the structure of an html page: the SKETCH_SIZE
+    smallest hashes of its shingles of SHINGLE_SIZE consecutive
+    tags, identified by their name and class.
+
+    Pages of the same template have close sketches, whatever
+    their text, dates or numbers.
+    """
+    tags = ["{}.{}".format(tag.lower(), DIGITS_REGEX.sub("#", classes)) \
+            for tag, classes in STRUCTURE_TAG_REGEX.findall(html_content)]
+    shingles = {zlib.crc32("\0".join(tags[index:index + SHINGLE_SIZE])\
+            .encode("utf8", "surrogatepass")) for index in \
+            range(max(0, len(tags) - SHINGLE_SIZE + 1))}
+    return tuple(sorted(heapq.nsmallest(SKETCH_SIZE, shingles)))
+
+def resemblance(sketch, other_sketch):
+    """
+    Estimate the ratio of shingles shared by two pages (Jaccard
+    index), from their sketches.
+    """
+    if not sketch or not other_sketch:
+        return 0
+    union = heapq.nsmallest(SKETCH_SIZE, set(sketch) | set(other_sketch))
+    shared = set(sketch) & set(other_sketch)
+    return sum(1 for shingle in union if shingle in shared) / len(union)
+
+def url_pattern(url):
+    """
+    Pattern of an url, identical for pages of a same calendar,
+    playlist, pagination or archive: canonical url with
+    numbers replaced by '#'.
+    """
+    return DIGITS_REGEX.sub("#", canonical_url(url))
+
+
+class TemplateDetector:
+    """
+    Find url patterns producing near duplicate pages.
+
+    Sketches of the first pages of each pattern are kept, a
+    pattern is templated once `limit` of its pages are near
+    duplicates of a previous one.
+    """
+    DEFAULT_LIMIT = 2
+    #Sketches kept by pattern
+    MAX_SKETCHES = 4
+
+    def __init__(self, limit=DEFAULT_LIMIT):
+        self.limit = limit
+        self.templated = set()
+        self._sketches = {}
+        self._duplicates = {}
+
+    def add(self, url, sketch):
+        """
+        Record the sketch of a fetched page.
+        return: True when its url pattern becomes templated
+        """
+        pattern = url_pattern(url)
+        if pattern in self.templated:
+            return False
+        sketches = self._sketches.setdefault(pattern, [])
+        if any(resemblance(sketch, other) >= DUPLICATE_RESEMBLANCE \
+                for other in sketches):
+            self._duplicates[pattern] = self._duplicates.get(pattern, 0) + 1
+            if self._duplicates[pattern] >= self.limit:
+                self.templated.add(pattern)
+                del self._sketches[pattern]
+                return True
+        elif len(sketches) < self.MAX_SKETCHES:
+            sketches.append(sketch)
+        return False
+
+    def is_templated(self, url):
+        return bool(self.templated) and url_pattern(url) in self.templated
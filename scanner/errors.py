@@ -5,6 +5,22 @@ class UrlException(ScannerError):
     """Raise when there is an error while trying to GET url"""
     __module__ = "Site"
 
+class ContentError(UrlException):
+    """Raise when the content of an url isn't an html page"""
+    __module__ = "Site"
+
 class LifetimeExceeded(ScannerError):
     """Site parsing exceeded the limited time"""
     __module__ = "Site"
+
+def failure_class(error):
+    """
+    Name of the error class which made a site fail, the
+    network error behind an UrlException when known.
+    """
+    cause = getattr(error, "__cause__", None)
+    if cause is not None:
+        return type(cause).__name__
+    if isinstance(error, str):
+        return error
+    return type(error).__name__
@@ -0,0 +1,265 @@
+import functools
+import hashlib
+import heapq
+import itertools
+import re
+import urllib.parse as URLParse
+
+#Words pointing to a contact page, by wikipedia lang, matched as whole
+#words ('-' separated words match consecutive words)
+CONTACT_KEYWORDS = {
+    "en" : ["contact", "contacts", "contactus", "reach-us", "get-in-touch",
+        "write-to-us"],
+    "fr" : ["contact", "nous-contacter", "contactez", "mentions-legales"],
+    "de" : ["kontakt", "impressum"],
+    "es" : ["contacto", "contactenos", "contactanos", "aviso-legal"],
+    "it" : ["contatti", "contattaci", "contatto"],
+    "pt" : ["contato", "contacto", "fale-conosco", "contactos"],
+    "nl" : ["contact", "colofon"],
+    "pl" : ["kontakt"],
+    "sv" : ["kontakt", "kontakta"],
+    "da" : ["kontakt"],
+    "no" : ["kontakt"],
+    "fi" : ["yhteystiedot", "ota-yhteytta"],
+    "cs" : ["kontakt", "kontakty"],
+    "tr" : ["iletisim"],
+    "ro" : ["contact"],
+    "hu" : ["kapcsolat", "impresszum"],
+    }
+
+#Words of pages which often contain a contact
+RELATED_KEYWORDS = {
+    "en" : ["about", "team", "staff", "advertise", "advertising", "imprint",
+        "legal"],
+    "fr" : ["a-propos", "qui-sommes-nous", "equipe", "publicite"],
+    "de" : ["ueber-uns", "uber-uns", "team", "redaktion", "werbung"],
+    "es" : ["quienes-somos", "equipo", "publicidad", "nosotros"],
+    "it" : ["chi-siamo", "redazione", "pubblicita"],
+    "pt" : ["sobre", "quem-somos", "equipe", "publicidade"],
+    "nl" : ["over-ons", "redactie", "adverteren"],
+    "pl" : ["o-nas", "redakcja", "reklama"],
+    "sv" : ["om-oss", "redaktion", "annonsera"],
+    "da" : ["om-os", "redaktion"],
+    "no" : ["om-oss", "redaksjon"],
+    "fi" : ["tietoa", "toimitus"],
+    "cs" : ["o-nas", "redakce", "reklama"],
+    "tr" : ["hakkimizda", "kunye", "reklam"],
+    "ro" : ["despre", "echipa", "publicitate"],
+    "hu" : ["rolunk", "szerkesztoseg", "hirdetes"],
+    }
+
+CONTACT_SCORE = 10
+RELATED_SCORE = 3
+
+
+def keywords(lang):
+    """
+    Retrieve (contact, related) keywords of a lang, always
+    completed with english ones.
+    """
+    contact = frozenset(CONTACT_KEYWORDS["en"]) | \
+            frozenset(CONTACT_KEYWORDS.get(lang, []))
+    related = frozenset(RELATED_KEYWORDS["en"]) | \
+            frozenset(RELATED_KEYWORDS.get(lang, []))
+    return contact, related
+
+def _normalize_words(text):
+    """
+    Lowercase a text and use '-' as word separator, to match
+    keywords in both urls and anchor texts.
+    """
+    text = text.lower()
+    for separator in " _/.+%":
+        text = text.replace(separator, "-")
+    return text
+
+@functools.lru_cache(maxsize=64)
+def _keywords_regex(words):
+    """
+    Regex matching any of a frozenset of keywords as whole
+    words of a normalized text.
+    """
+    if not words:
+        #Never matches
+        return re.compile(r"(?!)")
+    alternatives = "|".join(re.escape(word) for word in \
+            sorted(words, key=len, reverse=True))
+    return re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)")
+
+def score_link(url, text, contact_words, related_words):
+    """
+    Score the probability of an url to be a contact page, with
+    its path and the anchor text of the link.
+
+    Keywords must match whole words: 'team' matches '/our-team'
+    but not '/steam'.
+    """
+    path = URLParse.urlsplit(url).path
+    words = _normalize_words(path) + " " + _normalize_words(text)
+
+    score = 0
+    if _keywords_regex(frozenset(contact_words)).search(words):
+        score += CONTACT_SCORE
+    if _keywords_regex(frozenset(related_words)).search(words):
+        score += RELATED_SCORE
+    #Prefer shallow pages at equal score
+    depth = len([part for part in path.split("/") if part])
+    return score - depth * 0.1
+
+
+def url_hash(url):
+    """
+    64 bits hash of an url, stable between processes.
+    """
+    digest = hashlib.blake2b(url.encode("utf8", "surrogatepass"),
+            digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class VisitedSet:
+    """
+    Set of explored urls, stored as 64 bits hashes instead of
+    full strings.
+
+    Only the first `max_urls` urls are also kept as text, in
+    `sample`: a truncated list of explored urls when len() of
+    the set is larger.
+    """
+    DEFAULT_MAX_URLS = 1000
+
+    def __init__(self, max_urls=DEFAULT_MAX_URLS):
+        self.max_urls = max_urls
+        self.sample = []
+        self._hashes = set()
+
+    def add(self, url):
+        key = url_hash(url)
+        if key in self._hashes:
+            return None
+        self._hashes.add(key)
+        if len(self.sample) < self.max_urls:
+            self.sample.append(url)
+
+    def __contains__(self, url):
+        return url_hash(url) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+
+class Frontier:
+    """
+    Urls waiting to be explored, popped by decreasing probability
+    of being a contact page (see score_link).
+
+    Keep the best score of an url pushed multiple times.
+
+    At most `max_size` urls are kept (None for no limit): once
+    full, an url evicts the lowest scored one, or is dropped when
+    it doesn't score better.
+    """
+    DEFAULT_MAX_SIZE = 2000
+
+    def __init__(self, lang="en", max_size=DEFAULT_MAX_SIZE):
+        self.lang = lang
+        self.max_size = max_size
+        self.evicted = 0
+        self._contact_words, self._related_words = keywords(lang)
+        #Best first heap, and worst first heap used for eviction.
+        #Both contain outdated entries, skipped when popped.
+        self._heap = []
+        self._worst = []
+        #(score, push counter) of each url
+        self._scores = {}
+        self._counter = itertools.count()
+
+    def score(self, url, text=""):
+        return score_link(url, text, self._contact_words,
+                self._related_words)
+
+    def push(self, url, text=""):
+        score = self.score(url, text)
+        if url in self._scores and self._scores[url][0] >= score:
+            return None
+        if self.max_size is not None and url not in self._scores and \
+                len(self._scores) >= self.max_size and not self._evict(score):
+            return None
+        count = next(self._counter)
+        self._scores[url] = (score, count)
+        heapq.heappush(self._heap, (-score, count, url))
+        if self.max_size is not None:
+            #Evict the most recent url among the lowest scores
+            heapq.heappush(self._worst, (score, -count, url))
+            if len(self._heap) + len(self._worst) > 4 * self.max_size:
+                self._compact()
+
+    def update(self, links):
+        """
+        Push a list of (url, anchor text).
+        """
+        for url, text in links:
+            self.push(url, text)
+
+    def pop(self):
+        """
+        Retrieve the url with the highest score.
+        """
+        while self._heap:
+            score, count, url = heapq.heappop(self._heap)
+            #Skip entries replaced by a better score, or evicted
+            if self._scores.get(url) == (-score, count):
+                del self._scores[url]
+                return url
+        raise KeyError("pop from an empty frontier")
+
+    def prune(self, predicate):
+        """
+        Remove urls for which predicate(url, score) is true.
+        return: number of removed urls
+        """
+        pruned = [url for url, (score, _) in self._scores.items() \
+                if predicate(url, score)]
+        for url in pruned:
+            del self._scores[url]
+        return len(pruned)
+
+    def _evict(self, score):
+        """
+        Remove the lowest scored url to make room for an url
+        of `score`, if it's lower.
+        return: True when an url was evicted
+        """
+        while self._worst:
+            worst_score, count, url = self._worst[0]
+            if self._scores.get(url) != (worst_score, -count):
+                heapq.heappop(self._worst)
+                continue
+            if worst_score >= score:
+                return False
+            heapq.heappop(self._worst)
+            del self._scores[url]
+            self.evicted += 1
+            return True
+        return False
+
+    def _compact(self):
+        """
+        Rebuild both heaps without their outdated entries.
+        """
+        self._heap = [(-score, count, url) for url, (score, count) \
+                in self._scores.items()]
+        self._worst = [(score, -count, url) for url, (score, count) \
+                in self._scores.items()]
+        heapq.heapify(self._heap)
+        heapq.heapify(self._worst)
+
+    def clear(self):
+        self._heap = []
+        self._worst = []
+        self._scores = {}
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __contains__(self, url):
+        return url in self._scores
@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import threading
+import time
+
+from .url import canonical_host, parse_site
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS site_health (
+    host TEXT PRIMARY KEY,
+    failure TEXT NOT NULL,
+    failures INTEGER NOT NULL,
+    failed_at REAL NOT NULL
+);
+"""
+
+
+def site_key(site):
+    """
+    Host of a radio site, used as key of its health.
+    """
+    try:
+        return canonical_host(parse_site(site).netloc)
+    except ValueError:
+        return site
+
+
+class SiteHealth:
+    """
+    Persistent record of sites failing on their homepage, shared
+    between runs: failure class, time of the last failure and
+    number of consecutive failures of each host.
+
+    A failing host is skipped during `ttl` seconds, doubled at each
+    new consecutive failure up to MAX_BACKOFF, and retried after it.
+    A successful exploration forgets its failures.
+    """
+    DEFAULT_TTL = 24 * 3600
+    MAX_BACKOFF = 30 * 24 * 3600
+    BUSY_TIMEOUT = 60
+
+    def __init__(self, filename, ttl=DEFAULT_TTL):
+        self.filename = os.path.abspath(filename)
+        self.ttl = ttl
+        self._local = threading.local()
+        with self.connection as connection:
+            connection.executescript(SCHEMA)
+
+    @property
+    def connection(self):
+        """
+        Connection of the current thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.filename,
+                    timeout=self.BUSY_TIMEOUT)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def backoff(self, failures):
+        """
+        Duration a host is skipped after consecutive failures.
+        """
+        if failures <= 0:
+            return 0
+        return min(self.ttl * 2 ** (failures - 1), self.MAX_BACKOFF)
+
+    def status(self, host):
+        """
+        Retrieve (failure class, consecutive failures, retry time)
+        of a host, None for a healthy host.
+        """
+        row = self.connection.execute("SELECT failure, failures, failed_at "
+                "FROM site_health WHERE host = ?", (host,)).fetchone()
+        if row is None:
+            return None
+        failure, failures, failed_at = row
+        return failure, failures, failed_at + self.backoff(failures)
+
+    def should_skip(self, host):
+        """
+        Check if a host failed recently enough to not be retried yet.
+        """
+        status = self.status(host)
+        return status is not None and status[2] > time.time()
+
+    def retry_time(self, host):
+        """
+        Time (time.time value) from which a host is explored again.
+        """
+        status = self.status(host)
+        return status[2] if status else time.time()
+
+    def failures(self, host):
+        status = self.status(host)
+        return status[1] if status else 0
+
+    def record_failure(self, host, failure):
+        with self.connection as connection:
+            updated = connection.execute("UPDATE site_health SET "
+                    "failure = ?, failures = failures + 1, failed_at = ? "
+                    "WHERE host = ?", (failure, time.time(), host))
+            if not updated.rowcount:
+                connection.execute("INSERT INTO site_health "
+                        "(host, failure, failures, failed_at) "
+                        "VALUES (?, ?, 1, ?)", (host, failure, time.time()))
+
+    def record_success(self, host):
+        with self.connection as connection:
+            connection.execute("DELETE FROM site_health WHERE host = ?",
+                    (host,))
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+import time
+
+
+class ScanJournal:
+    """
+    Append-only journal of explored radios, written as one
+    json line per radio as soon as its site is explored.
+
+    Allow to resume an interrupted scan: radios already explored,
+    or with an unreachable website, aren't explored again.
+    """
+    DONE = "done"
+    FAILED = "failed"
+    #Bytes read at once when searching the last complete line
+    BLOCK_SIZE = 4096
+
+    def __init__(self, filename, resume=False):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self.completed = self.load() if resume else {}
+        if resume:
+            self._drop_partial_line()
+        self._stream = open(self.filename, "a" if resume else "w",
+                encoding="utf8")
+
+    @staticmethod
+    def key(section, radio_info):
+        return (section, radio_info.name, radio_info.site)
+
+    def load(self):
+        """
+        Read records of a previous run, as
+        {(section, radio, site) : record}.
+        Ignore a last line truncated by a crash.
+        """
+        completed = {}
+        if not os.path.exists(self.filename):
+            return completed
+        with open(self.filename, "r", encoding="utf8") as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                    key = (record["section"], record["radio"], record["site"])
+                except (ValueError, KeyError):
+                    continue
+                completed[key] = record
+        return completed
+
+    def _drop_partial_line(self):
+        """
+        Cut a last line truncated by a crash, new records
+        mustn't be appended to it.
+        """
+        if not os.path.exists(self.filename):
+            return None
+        with open(self.filename, "rb+") as journal:
+            end = journal.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - self.BLOCK_SIZE)
+                journal.seek(start)
+                block = journal.read(position - start)
+                newline = block.rfind(b"\n")
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position != end:
+                journal.truncate(position)
+
+    def restore(self, section, radio_info):
+        """
+        Apply to a RadioInfo the mails found in a previous run.
+        return: True if the radio was already explored.
+        """
+        record = self.completed.get(self.key(section, radio_info))
+        if record is None:
+            return False
+        radio_info.update_mails(set(record["domain_mails"]),
+                set(record["unsure_mails"]))
+        return True
+
+    def record(self, section, radio_info, status=DONE):
+        """
+        Append the result of an explored radio, and flush it on disk.
+        """
+        record = {
+            "section" : section,
+            "radio" : radio_info.name,
+            "site" : radio_info.site,
+            "status" : status,
+            "domain_mails" : sorted(radio_info.domain_mails),
+            "unsure_mails" : sorted(radio_info.unsure_mails),
+            "time" : time.time(),
+            }
+        with self._lock:
+            self._stream.write(json.dumps(record) + "\n")
+            self._stream.flush()
+            os.fsync(self._stream.fileno())
+
+    def close(self):
+        self._stream.close()
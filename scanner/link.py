@@ -1,19 +1,317 @@
 from html.parser import HTMLParser
+import html
+import re
+import string
 
 class LinkParser(HTMLParser):
-    """ DOM parser to retrieve href of all <a> elements """
+    """
+    DOM parser to retrieve href of all <a> elements,
+    with their anchor text.
+
+    Reference implementation of extract_links, which is
+    much faster and used by the scanner.
+    """
 
     def parse_links(self, html_content):
+        """
+        return: list of (href, anchor text)
+        """
         self.links = []
+        self._anchor = None
         try:
             self.feed(html_content)
         except NotImplementedError:
             pass
+        self._close_anchor()
         return self.links
 
     def handle_starttag(self, tag, attrs):
         if tag == "a":
+            self._close_anchor()
             attrs = {key.lower():value for key, *value in attrs}
             urls = attrs.get("href", None)
             if urls and urls[0]:
-                self.links.append(urls[0])
+                self._anchor = (urls[0], [])
+
+    def handle_data(self, data):
+        if self._anchor:
+            self._anchor[1].append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "a":
+            self._close_anchor()
+
+    def _close_anchor(self):
+        """
+        Store the current <a> element, with its text content.
+        """
+        if self._anchor:
+            url, text = self._anchor
+            self.links.append((url, " ".join("".join(text).split())))
+            self._anchor = None
+
+
+#Tolerant tokenizer rules of html.parser, to find the same tags and
+#attributes as LinkParser on malformed html.
+TAGFIND_REGEX = re.compile(r"([a-zA-Z][^\t\n\r\f />\x00]*)(?:\s|/(?!>))*")
+ATTRFIND_REGEX = re.compile(
+    r"((?<=['\"\s/])[^\s/>][^\s/=>]*)(\s*=+\s*"
+    r"('[^']*'|\"[^\"]*\"|(?!['\"])[^>\s]*))?(?:\s|/(?!>))*")
+LOCATE_STARTTAG_END_REGEX = re.compile(r"""
+  <[a-zA-Z][^\t\n\r\f />\x00]*       # tag name
+  (?:[\s/]*                          # optional whitespace before attribute name
+    (?:(?<=['"\s/])[^\s/>][^\s/=>]*  # attribute name
+      (?:\s*=+\s*                    # value indicator
+        (?:'[^']*'                   # LITA-enclosed value
+          |"[^"]*"                   # LIT-enclosed value
+          |(?!['"])[^>\s]*           # bare value
+         )
+        \s*                          # possibly followed by a space
+       )?(?:\s|/(?!>))*
+     )*
+   )?
+  \s*                                # trailing whitespace
+""", re.VERBOSE)
+ENDTAG_REGEX = re.compile(r"</\s*([a-zA-Z][-.a-zA-Z0-9:_]*)\s*>")
+COMMENT_CLOSE_REGEX = re.compile(r"--\s*>")
+DECLNAME_REGEX = re.compile(r"[a-zA-Z][-_.a-zA-Z0-9]*")
+MARKED_SECTION_CLOSE = {
+    "cdata" : re.compile(r"]\s*]\s*>"),
+    "if" : re.compile(r"]\s*>"),
+    }
+
+#Any '<' which can start a markup
+MARKUP_OPEN_REGEX = re.compile(r"<[a-zA-Z/!?]")
+#Well-formed markup which can't contain a link. Anything else is
+#tokenized with the rules above.
+SKIPPED_MARKUP = r"""
+    </%s[^>]*>                                  # end tag
+    |<!--.*?--\s*>                              # comment
+    |<(?!(?:[aA]|[sS][cC][rR][iI][pP][tT]|[sS][tT][yY][lL][eE])
+          (?:[\t\n\r\f />\x00]|\Z))
+     [a-zA-Z][^\t\n\r\f />\x00]*                 # other start tag
+     (?:\s+[^\s"'>/=]+
+        (?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'=<>`]+))?
+     )*\s*/?>
+"""
+#Well-formed <a> start tag, and its attributes
+STRICT_ANCHOR_REGEX = re.compile(r"""
+    <[aA](?=[\s/>])
+    (?:\s+[^\s"'>/=]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'=<>`]+))?)*
+    \s*(/?)>
+""", re.VERBOSE)
+STRICT_ATTRIBUTE_REGEX = re.compile(
+    r"""\s([^\s"'>/=]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s"'=<>`]+))?""")
+
+#End tags closing an <a> element
+ANCHOR_ENDTAG = r"(?!\s*[aA]\s*>|[aA][\t\n\r\f />\x00])"
+TEXT = r"""[^<]+|<(?![a-zA-Z/!?])"""
+
+#Skip in a single match text and markup outside of <a> elements
+SKIP_REGEX = re.compile(f"(?:{TEXT}|{SKIPPED_MARKUP % ''})*",
+        re.VERBOSE | re.DOTALL)
+#Same inside <a> elements, keeping the </a> end tag
+ANCHOR_SKIP_REGEX = re.compile(
+        f"(?:{TEXT}|{SKIPPED_MARKUP % ANCHOR_ENDTAG})*",
+        re.VERBOSE | re.DOTALL)
+#Retrieve text of a part matched by ANCHOR_SKIP_REGEX
+ANCHOR_TEXT_REGEX = re.compile(
+        f"({TEXT})|{SKIPPED_MARKUP % ANCHOR_ENDTAG}",
+        re.VERBOSE | re.DOTALL)
+INCOMPLETE_CHARREF_END = re.compile(r"[\s;]")
+RAW_TEXT_CLOSE = {
+    "script" : re.compile(r"</\s*script\s*>", re.I),
+    "style" : re.compile(r"</\s*style\s*>", re.I),
+    }
+
+
+def _starttag_end(html_content, start):
+    """
+    Position after the start tag beginning at `start`,
+    -1 when the tag is never closed.
+    """
+    end = LOCATE_STARTTAG_END_REGEX.match(html_content, start).end()
+    next_char = html_content[end:end + 1]
+    if next_char == ">":
+        return end + 1
+    if next_char == "/":
+        return end + 2 if html_content.startswith("/>", end) else -1
+    if next_char == "" or next_char in string.ascii_letters + "=":
+        return -1
+    return end if end > start else start + 1
+
+def _parse_attributes(html_content, start, end):
+    """
+    Retrieve attributes of the tag html_content[start:end].
+
+    return: (attributes dict, tag ending) where a valid tag
+    ending is '>' or '/>'
+    """
+    attributes = {}
+    while start < end:
+        match = ATTRFIND_REGEX.match(html_content, start)
+        if not match:
+            break
+        name, rest, value = match.group(1, 2, 3)
+        if not rest:
+            value = None
+        elif value[:1] == "'" == value[-1:] or value[:1] == '"' == value[-1:]:
+            value = value[1:-1]
+        if value:
+            value = html.unescape(value)
+        attributes[name.lower()] = value
+        start = match.end()
+    return attributes, html_content[start:end].strip()
+
+def _markup_end(html_content, start):
+    """
+    Position after a comment, declaration or processing
+    instruction beginning at `start`, -1 when never closed.
+    """
+    if html_content.startswith("<!--", start):
+        match = COMMENT_CLOSE_REGEX.search(html_content, start + 4)
+        return match.end() if match else -1
+    if html_content.startswith("<![", start):
+        name = DECLNAME_REGEX.match(html_content, start + 3)
+        name = name.group().lower() if name else ""
+        if name in ["else", "endif"]:
+            name = "if"
+        close_regex = MARKED_SECTION_CLOSE.get(name)
+        if close_regex:
+            match = close_regex.search(html_content, start + 3)
+            return match.end() if match else -1
+    end = html_content.find(">", start + 2)
+    return end + 1 if end >= 0 else -1
+
+def _strict_anchor_href(anchor_tag):
+    """
+    Retrieve the href of a tag matched by STRICT_ANCHOR_REGEX,
+    the last one when defined multiple times.
+    """
+    href = None
+    for name, value in STRICT_ATTRIBUTE_REGEX.findall(anchor_tag):
+        if name.lower() == "href":
+            href = value
+    if href and href[0] in "'\"":
+        href = href[1:-1]
+    return html.unescape(href) if href else href
+
+def _incomplete_charref(html_content, start):
+    """
+    html.parser keeps back the text after the last markup when it
+    may end with a truncated character reference, like '&am'.
+    """
+    ampersand = html_content.rfind("&", max(start, len(html_content) - 34))
+    return ampersand >= 0 and \
+            not INCOMPLETE_CHARREF_END.search(html_content, ampersand)
+
+def extract_links(html_content):
+    """
+    Retrieve href of all <a> elements with their anchor text,
+    same result as LinkParser.parse_links.
+
+    Text and regular tags are skipped with a single regex. Other
+    markup is tokenized with the tolerant rules of html.parser,
+    and attributes are parsed for <a>, <script> and <style>
+    tags only.
+
+    return: list of (href, anchor text)
+    """
+    links = []
+    #href and text pieces of the current <a> element
+    anchor = None
+    text = []
+    #Start of the text after the last markup, and its first piece
+    segment_start = segment_piece = 0
+
+    def close_anchor():
+        if anchor:
+            links.append((anchor, " ".join("".join(text).split())))
+
+    position = 0
+    while True:
+        if not anchor:
+            position = SKIP_REGEX.match(html_content, position).end()
+        else:
+            #Keep the text of skipped content
+            end = ANCHOR_SKIP_REGEX.match(html_content, position).end()
+            for token in ANCHOR_TEXT_REGEX.finditer(html_content,
+                    position, end):
+                token_text = token.group(1)
+                if token_text and token_text != "<":
+                    text.append(html.unescape(token_text))
+                    continue
+                #A '<' ending the document is kept back
+                if token_text and token.end() < len(html_content):
+                    text.append(token_text)
+                segment_start, segment_piece = token.end(), len(text)
+            position = end
+
+        match = MARKUP_OPEN_REGEX.search(html_content, position)
+        if match is None:
+            if anchor and _incomplete_charref(html_content, segment_start):
+                del text[segment_piece:]
+            break
+        start = match.start()
+
+        #End tag, only </a> is meaningful
+        if html_content[start + 1] == "/":
+            end = html_content.find(">", start + 2)
+            if end < 0:
+                break
+            name = ENDTAG_REGEX.match(html_content, start) or \
+                    TAGFIND_REGEX.match(html_content, start + 2)
+            if name and name.group(1).lower() == "a":
+                close_anchor()
+                anchor = None
+            position = end + 1
+
+        #Comment, declaration, processing instruction
+        elif html_content[start + 1] in "!?":
+            position = _markup_end(html_content, start)
+            if position < 0:
+                break
+
+        #Well-formed <a> tag
+        elif html_content[start + 1] in "aA" and \
+                STRICT_ANCHOR_REGEX.match(html_content, start):
+            strict_anchor = STRICT_ANCHOR_REGEX.match(html_content, start)
+            close_anchor()
+            anchor, text = _strict_anchor_href(strict_anchor.group()), []
+            #Self closing <a/>
+            if strict_anchor.group(1):
+                close_anchor()
+                anchor = None
+            position = strict_anchor.end()
+
+        #Any other start tag
+        else:
+            end = _starttag_end(html_content, start)
+            if end < 0:
+                break
+            name = TAGFIND_REGEX.match(html_content, start + 1)
+            tag = name.group(1).lower()
+            position = end
+            if anchor or tag in ["a", "script", "style"]:
+                attributes, tag_ending = _parse_attributes(html_content,
+                        name.end(), end)
+                #Invalid tag, handled as text
+                if tag_ending not in [">", "/>"]:
+                    text.append(html_content[start:end])
+                elif tag == "a":
+                    close_anchor()
+                    anchor, text = attributes.get("href"), []
+                    if tag_ending == "/>":
+                        close_anchor()
+                        anchor = None
+                #Script and style content isn't html
+                elif tag in RAW_TEXT_CLOSE and tag_ending == ">":
+                    raw_end = RAW_TEXT_CLOSE[tag].search(html_content, end)
+                    if raw_end is None:
+                        break
+                    text.append(html_content[end:raw_end.start()])
+                    position = raw_end.end()
+
+        segment_start, segment_piece = position, len(text)
+    close_anchor()
+    return links
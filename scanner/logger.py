@@ -12,8 +12,9 @@ class LogRadio:
     def __init__(self, filename):
         self.datafile = filename
         # Replace .template extension by .csv
-        filename = filename.split('.')[:-1] + ["csv"]
-        self.recordfile = ".".join(filename)
+        filename = filename.split('.')[:-1]
+        self.recordfile = ".".join(filename + ["csv"])
+        self.journalfile = ".".join(filename + ["journal"])
         self.description_column = None
         self.radio_dataset = self.retrieve_data()
 
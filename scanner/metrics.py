@@ -0,0 +1,267 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+#Upper bounds of histogram buckets, in seconds
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+DURATION_BUCKETS = [1, 2, 5, 10, 15, 20, 30, 60, 120]
+
+PROMETHEUS_PREFIX = "radio_scanner"
+
+
+class Histogram:
+    """
+    Distribution of observed values, in cumulative buckets
+    like Prometheus histograms.
+    """
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        Retrieve [(upper bound, number of values <= bound)],
+        ending with the "+Inf" bound.
+        """
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + ["+Inf"], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def as_dict(self):
+        return {
+            "buckets" : {str(bound) : count for bound, count in \
+                    self.cumulative()},
+            "sum" : self.sum,
+            "count" : self.count,
+            }
+
+
+class SiteMetrics:
+    """
+    Metrics of a single Site exploration. Fetches are recorded
+    from the fetch workers of the site.
+    """
+    NONE = "none"
+    NORMAL = "normal"
+    DESPERATE = "desperate"
+    UNSURE = "unsure"
+
+    def __init__(self, site):
+        self.site = site
+        self.pages = 0
+        self.bytes = 0
+        self.latencies = []
+        self.errors = {}
+        self.duration = None
+        self.first_domain_mail = None
+        self.outcome = self.NONE
+        self.lifetime_exceeded = False
+        #Urls of templated patterns dropped from the frontier
+        self.pruned_urls = 0
+        self._lock = threading.Lock()
+
+    def fetched(self, latency, size):
+        with self._lock:
+            self.pages += 1
+            self.bytes += size
+            self.latencies.append(latency)
+
+    def failed(self, latency, error_class):
+        with self._lock:
+            self.latencies.append(latency)
+            self.errors[error_class] = self.errors.get(error_class, 0) + 1
+
+    def as_dict(self):
+        return {
+            "site" : self.site,
+            "pages" : self.pages,
+            "bytes" : self.bytes,
+            "fetches" : len(self.latencies),
+            "errors" : dict(self.errors),
+            "duration" : self.duration,
+            "first_domain_mail" : self.first_domain_mail,
+            "outcome" : self.outcome,
+            "lifetime_exceeded" : self.lifetime_exceeded,
+            "pruned_urls" : self.pruned_urls,
+            }
+
+
+class CrawlMetrics:
+    """
+    Aggregate metrics of all sites explored by a run.
+
+    Written as json and Prometheus text format files by
+    MetricsWriter.
+    """
+    def __init__(self):
+        self.started = time.time()
+        self.sites = 0
+        self.pages = 0
+        self.bytes = 0
+        self.fetch_latency = Histogram(LATENCY_BUCKETS)
+        self.site_duration = Histogram(DURATION_BUCKETS)
+        self.first_domain_mail = Histogram(DURATION_BUCKETS)
+        self.outcomes = {}
+        self.errors = {}
+        self.lifetime_overruns = 0
+        self.pruned_urls = 0
+        self.per_site = []
+        self._lock = threading.Lock()
+
+    def add_site(self, site_metrics):
+        with self._lock:
+            self.sites += 1
+            self.pages += site_metrics.pages
+            self.bytes += site_metrics.bytes
+            for latency in site_metrics.latencies:
+                self.fetch_latency.observe(latency)
+            if site_metrics.duration is not None:
+                self.site_duration.observe(site_metrics.duration)
+            if site_metrics.first_domain_mail is not None:
+                self.first_domain_mail.observe(site_metrics.first_domain_mail)
+            outcome = site_metrics.outcome
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            for error_class, count in site_metrics.errors.items():
+                self.errors[error_class] = \
+                        self.errors.get(error_class, 0) + count
+            self.lifetime_overruns += site_metrics.lifetime_exceeded
+            self.pruned_urls += site_metrics.pruned_urls
+            self.per_site.append(site_metrics.as_dict())
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "started" : self.started,
+                "elapsed" : time.time() - self.started,
+                "sites" : self.sites,
+                "pages" : self.pages,
+                "bytes" : self.bytes,
+                "fetch_latency" : self.fetch_latency.as_dict(),
+                "site_duration" : self.site_duration.as_dict(),
+                "first_domain_mail" : self.first_domain_mail.as_dict(),
+                "outcomes" : dict(self.outcomes),
+                "errors" : dict(self.errors),
+                "lifetime_overruns" : self.lifetime_overruns,
+                "pruned_urls" : self.pruned_urls,
+                "per_site" : list(self.per_site),
+                }
+
+    def as_prometheus(self):
+        """
+        Format aggregate metrics in the Prometheus text format.
+        """
+        lines = []
+        def metric(name, kind, help_text, samples):
+            name = f"{PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_labels(labels)} {value}")
+
+        def histogram(name, help_text, values):
+            samples = [("_bucket", {"le" : str(bound)}, count) for \
+                    bound, count in values.cumulative()]
+            samples.append(("_sum", {}, values.sum))
+            samples.append(("_count", {}, values.count))
+            metric(name, "histogram", help_text, samples)
+
+        with self._lock:
+            metric("sites_total", "counter", "Explored radio sites",
+                    [("", {}, self.sites)])
+            metric("pages_total", "counter", "Fetched pages",
+                    [("", {}, self.pages)])
+            metric("bytes_total", "counter", "Bytes of fetched pages",
+                    [("", {}, self.bytes)])
+            histogram("fetch_latency_seconds", "Duration of page fetches",
+                    self.fetch_latency)
+            histogram("site_duration_seconds", "Duration of site explorations",
+                    self.site_duration)
+            histogram("first_domain_mail_seconds",
+                    "Time to find the first domain mail of a site",
+                    self.first_domain_mail)
+            metric("outcomes_total", "counter",
+                    "Sites by mode finding their mails",
+                    [("", {"outcome" : outcome}, count) for outcome, count \
+                    in sorted(self.outcomes.items())])
+            metric("errors_total", "counter", "Failed fetches by error class",
+                    [("", {"class" : error}, count) for error, count \
+                    in sorted(self.errors.items())])
+            metric("lifetime_overruns_total", "counter",
+                    "Sites stopped by their lifetime",
+                    [("", {}, self.lifetime_overruns)])
+            metric("pruned_urls_total", "counter",
+                    "Urls of near duplicate pages dropped from frontiers",
+                    [("", {}, self.pruned_urls)])
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = []
+    for name, value in labels.items():
+        value = value.replace("\\", "\\\\").replace('"', '\\"')\
+                .replace("\n", "\\n")
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+def _write_atomic(filename, content):
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "w", encoding="utf8") as stream:
+        stream.write(content)
+    os.replace(tmp_filename, filename)
+
+
+class MetricsWriter:
+    """
+    Write CrawlMetrics in basename.json and basename.prom every
+    `interval` seconds, and once more when closed.
+    """
+    DEFAULT_INTERVAL = 60
+
+    def __init__(self, metrics, basename, interval=DEFAULT_INTERVAL):
+        self.metrics = metrics
+        #The working directory may change during the run
+        self.basename = os.path.abspath(basename)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def write(self):
+        _write_atomic(self.basename + ".json",
+                json.dumps(self.metrics.as_dict(), indent=1))
+        _write_atomic(self.basename + ".prom", self.metrics.as_prometheus())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def start(self):
+        if self.interval and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
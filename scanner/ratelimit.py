@@ -0,0 +1,161 @@
+from email.utils import parsedate_to_datetime
+import socket
+import threading
+import time
+import urllib.parse as URLParse
+
+from .errors import LifetimeExceeded
+from .resolver import getaddrinfo
+from .url import canonical_host
+
+#Longest Retry-After delay accepted from a server
+MAX_RETRY_AFTER = 600
+
+
+def parse_retry_after(value):
+    """
+    Convert a Retry-After header, in seconds or as an http
+    date, to a number of seconds. None when invalid.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(int(value), MAX_RETRY_AFTER)
+    try:
+        retry_date = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_date is None:
+        return None
+    delay = retry_date.timestamp() - time.time()
+    return min(max(delay, 0), MAX_RETRY_AFTER)
+
+
+class TokenBucket:
+    """
+    Allow `rate` requests per second, with bursts of up to `burst`
+    requests.
+
+    Implemented by reservation: each request books the time its
+    token is available, so waiting requests are served in order.
+    """
+    def __init__(self, rate, burst=1):
+        self.interval = 1 / rate
+        self.tolerance = (max(1, burst) - 1) * self.interval
+        #Time when the bucket is empty again
+        self._empty_at = 0
+
+    def ready_time(self, now):
+        """
+        Time when the next token is available.
+        """
+        return max(now, self._empty_at - self.tolerance)
+
+    def reserve(self, when):
+        """
+        Consume a token at the given time.
+        """
+        self._empty_at = max(self._empty_at, when) + self.interval
+
+
+class RateLimiter:
+    """
+    Politeness of the scanner: limit requests per host, per IP
+    address (hosts sharing the same server) and for the whole run.
+
+    A rate of 0 disables the corresponding limit. Hosts answering
+    429 or 503 with a Retry-After header aren't requested again
+    before the given delay.
+    """
+    DEFAULT_HOST_RATE = 4
+    DEFAULT_IP_RATE = 8
+    DEFAULT_GLOBAL_RATE = 0
+
+    def __init__(self, host_rate=DEFAULT_HOST_RATE, ip_rate=DEFAULT_IP_RATE,
+            global_rate=DEFAULT_GLOBAL_RATE, burst=2):
+        self.host_rate = host_rate
+        self.ip_rate = ip_rate
+        self.burst = burst
+        self._global = TokenBucket(global_rate, burst) if global_rate \
+                else None
+        self._hosts = {}
+        self._ips = {}
+        self._host_ip = {}
+        self._blocked = {}
+        self._lock = threading.Lock()
+
+    def _resolve(self, hostname):
+        """
+        IP address of the hostname of an url, None when it
+        can't be resolved.
+        """
+        if hostname not in self._host_ip:
+            try:
+                addresses = getaddrinfo(hostname, None,
+                        type=socket.SOCK_STREAM)
+                self._host_ip[hostname] = addresses[0][4][0]
+            except (OSError, UnicodeError, IndexError):
+                self._host_ip[hostname] = None
+        return self._host_ip[hostname]
+
+    def _buckets(self, host, hostname):
+        buckets = [self._global] if self._global else []
+        if self.host_rate:
+            if host not in self._hosts:
+                self._hosts[host] = TokenBucket(self.host_rate, self.burst)
+            buckets.append(self._hosts[host])
+        ip = self._resolve(hostname) if self.ip_rate and hostname else None
+        if ip:
+            if ip not in self._ips:
+                self._ips[ip] = TokenBucket(self.ip_rate, self.burst)
+            buckets.append(self._ips[ip])
+        return buckets
+
+    @staticmethod
+    def _host(url):
+        return canonical_host(URLParse.urlsplit(url).netloc)
+
+    def acquire(self, url, deadline=None):
+        """
+        Wait until a request to the url is allowed.
+
+        Raise LifetimeExceeded, without consuming any token, when
+        the request can't be sent before the deadline
+        (time.perf_counter value).
+        """
+        host = self._host(url)
+        #Resolve the host actually connected to, canonical hosts
+        #drop 'www.'
+        hostname = URLParse.urlsplit(url).hostname
+        #Resolve outside the lock, a slow DNS mustn't block other hosts
+        if self.ip_rate and hostname:
+            self._resolve(hostname)
+
+        with self._lock:
+            now = time.perf_counter()
+            buckets = self._buckets(host, hostname)
+            ready = max([now, self._blocked.get(host, 0)] + \
+                    [bucket.ready_time(now) for bucket in buckets])
+            if deadline is not None and ready > deadline:
+                raise LifetimeExceeded(f"{host}: rate limited after deadline")
+            for bucket in buckets:
+                bucket.reserve(ready)
+
+        delay = ready - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def retry_after(self, url, value):
+        """
+        Block the host of the url for the delay of a Retry-After header.
+        return: the delay in seconds, None without valid header.
+        """
+        delay = parse_retry_after(value)
+        if delay is None:
+            return None
+        host = self._host(url)
+        with self._lock:
+            blocked = time.perf_counter() + delay
+            self._blocked[host] = max(self._blocked.get(host, 0), blocked)
+        return delay
@@ -0,0 +1,238 @@
+from concurrent.futures import ThreadPoolExecutor
+import ipaddress
+import socket
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+#Resolver errors meaning the host doesn't exist, other errors are
+#temporary failures
+DEAD_HOST_ERRORS = {socket.EAI_NONAME, getattr(socket, "EAI_NODATA", None)}
+
+_system_getaddrinfo = socket.getaddrinfo
+_dns_cache = None
+
+
+class DnsCache:
+    """
+    Cache of hostname resolutions, shared by all scanner requests
+    once installed with configure_dns.
+
+    Resolved hosts are kept `ttl` seconds, hosts which don't exist
+    `negative_ttl` seconds: a dead domain fails immediately instead
+    of waiting for the resolver again. Temporary failures are kept
+    RETRY_TTL seconds. Concurrent lookups of a same
+    host are done once.
+
+    `resolver` is a getaddrinfo like function, the system one
+    by default.
+    """
+    DEFAULT_TTL = 300
+    DEFAULT_NEGATIVE_TTL = 600
+    RETRY_TTL = 30
+    PREFETCH_CONCURRENCY = 64
+
+    def __init__(self, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL,
+            resolver=None):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.resolver = resolver or _system_getaddrinfo
+        #{host : (expiration, addresses)}
+        self._entries = {}
+        #{host : (expiration, socket.gaierror)}
+        self._failures = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """
+        Replacement of socket.getaddrinfo going through the cache.
+
+        Addresses are cached by host, for stream sockets (the only
+        ones used by the scanner): lookups of a host with other
+        ports or families reuse them.
+        """
+        if isinstance(host, bytes):
+            host = host.decode("idna")
+        host = host.lower() if host else host
+        while True:
+            with self._lock:
+                failure = self._failures.get(host)
+                if failure and failure[0] > time.monotonic():
+                    raise failure[1]
+                entry = self._entries.get(host)
+                if entry and entry[0] > time.monotonic():
+                    addresses = entry[1]
+                    break
+                event = self._pending.get(host)
+                if event is None:
+                    #Resolve it in this thread
+                    self._pending[host] = threading.Event()
+                    addresses = None
+                    break
+            #Wait for the resolution of another thread
+            event.wait()
+        if addresses is None:
+            addresses = self._resolve(host)
+        return self._with_port(addresses, port, family)
+
+    def _resolve(self, host):
+        try:
+            addresses = self.resolver(host, None, 0, socket.SOCK_STREAM)
+        except socket.gaierror as Error:
+            ttl = self.negative_ttl if Error.errno in DEAD_HOST_ERRORS \
+                    else min(self.RETRY_TTL, self.negative_ttl)
+            with self._lock:
+                self._failures[host] = (time.monotonic() + ttl, Error)
+            raise
+        else:
+            with self._lock:
+                self._entries[host] = (time.monotonic() + self.ttl, addresses)
+            return addresses
+        finally:
+            with self._lock:
+                event = self._pending.pop(host)
+            event.set()
+
+    @staticmethod
+    def _with_port(addresses, port, family=0):
+        """
+        getaddrinfo result of cached addresses for a port,
+        keeping only addresses of `family` when given.
+        """
+        if isinstance(port, bytes):
+            port = port.decode()
+        if port is None:
+            port = 0
+        elif isinstance(port, str):
+            port = int(port) if port.isdigit() \
+                    else socket.getservbyname(port, "tcp")
+        result = []
+        for address_family, type, proto, canonname, sockaddr in addresses:
+            if family and address_family != family:
+                continue
+            sockaddr = (sockaddr[0], port) + tuple(sockaddr[2:])
+            result.append((address_family, type, proto, canonname, sockaddr))
+        if not result:
+            raise socket.gaierror(socket.EAI_FAMILY,
+                    "Address family for hostname not supported")
+        return result
+
+    def is_dead(self, host):
+        """
+        Check if a host is known to not exist.
+        """
+        with self._lock:
+            failure = self._failures.get(host.lower())
+        if not failure or failure[0] <= time.monotonic():
+            return False
+        return failure[1].errno in DEAD_HOST_ERRORS
+
+    def prefetch(self, hosts):
+        """
+        Resolve concurrently a list of hosts, to have them
+        cached before the crawl.
+
+        return: set of hosts which don't exist.
+        """
+        def resolve(host):
+            try:
+                self.getaddrinfo(host, None)
+            except (socket.gaierror, UnicodeError):
+                pass
+            return self.is_dead(host)
+
+        hosts = list({host.lower() for host in hosts if host})
+        with ThreadPoolExecutor(self.PREFETCH_CONCURRENCY) as pool:
+            dead = pool.map(resolve, hosts)
+            return {host for host, is_dead in zip(hosts, dead) if is_dead}
+
+
+def configure_dns(cache):
+    """
+    Install a DnsCache for resolutions of the scanner session
+    and rate limiter, None to use the system resolver.
+    """
+    global _dns_cache
+    _dns_cache = cache
+
+def get_dns_cache():
+    return _dns_cache
+
+def getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    """
+    socket.getaddrinfo going through the configured DnsCache, when any.
+    """
+    dns_cache = _dns_cache
+    if dns_cache is None:
+        return _system_getaddrinfo(host, port, family, type, proto, flags)
+    return dns_cache.getaddrinfo(host, port, family, type, proto, flags)
+
+
+class _CachedDnsConnection:
+    """
+    Mixin of urllib3 connections resolving their host with the
+    configured DnsCache, then connecting to each resolved address
+    in turn like urllib3 does.
+    """
+    def _new_conn(self):
+        host = self._dns_host
+        if _dns_cache is None or _is_ip_address(host):
+            return super()._new_conn()
+        try:
+            addresses = getaddrinfo(host, self.port, allowed_gai_family(),
+                    socket.SOCK_STREAM)
+        except (socket.gaierror, UnicodeError) as Error:
+            raise NewConnectionError(self,
+                    f"Failed to resolve '{host}' ({Error})") from Error
+
+        Error = None
+        for address in dict.fromkeys(info[4][0] for info in addresses):
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except (ConnectTimeoutError, NewConnectionError) as Failure:
+                Error = Failure
+            finally:
+                self._dns_host = host
+        if Error is None:
+            raise NewConnectionError(self, f"No address for '{host}'")
+        raise Error
+
+def _is_ip_address(host):
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+    except ValueError:
+        return False
+    return True
+
+class CachedDnsHTTPConnection(_CachedDnsConnection, HTTPConnection):
+    pass
+
+class CachedDnsHTTPSConnection(_CachedDnsConnection, HTTPSConnection):
+    pass
+
+class CachedDnsHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CachedDnsHTTPConnection
+
+class CachedDnsHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CachedDnsHTTPSConnection
+
+
+class CachedDnsAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections resolve hosts with the DnsCache
+    installed by configure_dns, the rest of the process keeps the
+    system resolver.
+    """
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http" : CachedDnsHTTPConnectionPool,
+            "https" : CachedDnsHTTPSConnectionPool,
+            }
@@ -0,0 +1,228 @@
+from collections import namedtuple
+import threading
+import time
+
+import requests
+from urllib3.exceptions import HTTPError as Urllib3Error
+
+from .cache import CacheEntry
+from .errors import ContentError, LifetimeExceeded, UrlException
+from .resolver import CachedDnsAdapter
+
+#Number of hosts with a connection pool kept alive
+POOL_CONNECTIONS = 100
+#Number of connections kept alive for a single host
+POOL_MAXSIZE = 16
+
+#Maximum number of bytes read from a single page
+MAX_PAGE_SIZE = 2 * 1024 * 1024
+CHUNK_SIZE = 16 * 1024
+#Retries of a request answered 429/503 with a Retry-After header
+RETRY_ATTEMPTS = 1
+RETRY_STATUS = [429, 503]
+#Content types accepted as html pages
+HTML_CONTENT_TYPES = ["text/html", "application/xhtml+xml", "text/plain"]
+
+_session = None
+_session_lock = threading.Lock()
+_cache = None
+_limiter = None
+
+#Page retrieved by fetch, from the network or the ResponseCache.
+#size is the number of body bytes received, 0 without download
+Page = namedtuple("Page", ["url", "status", "text", "size"])
+
+
+def _build_session(pool_connections, pool_maxsize):
+    """
+    Create a requests.Session with keep-alive connection pools
+    for http and https urls, resolving hosts with the DnsCache.
+    """
+    session = requests.Session()
+    adapter = CachedDnsAdapter(pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def configure_session(pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE):
+    """
+    Replace the shared session by a new one with the given
+    pool sizes. Must be called before any crawl is launched.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = _build_session(pool_connections, pool_maxsize)
+    return _session
+
+def get_session():
+    """
+    Retrieve the session shared by all scanner requests, reusing
+    connections (and TLS negotiation) between pages of a same host.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session(POOL_CONNECTIONS, POOL_MAXSIZE)
+        return _session
+
+def configure_cache(cache):
+    """
+    Set the ResponseCache used by fetch, None to disable caching.
+    """
+    global _cache
+    _cache = cache
+
+def configure_rate_limit(limiter):
+    """
+    Set the RateLimiter applied to each request, None to disable it.
+    """
+    global _limiter
+    _limiter = limiter
+
+def remaining_time(deadline):
+    """
+    Seconds left before a time.perf_counter deadline, raise
+    LifetimeExceeded once it is reached.
+    """
+    remaining = deadline - time.perf_counter()
+    if remaining <= 0:
+        raise LifetimeExceeded("Deadline reached")
+    return remaining
+
+def fetch(url, timeout, headers=None, max_size=MAX_PAGE_SIZE, deadline=None):
+    """
+    GET an url with the shared session, going through the
+    ResponseCache when configured.
+
+    Fresh cached pages are returned without any request, stale
+    ones are revalidated with a conditional request.
+
+    The body is streamed: non html content is rejected with a
+    ContentError as soon as headers are received, and html pages
+    are truncated after `max_size` bytes.
+
+    With a `deadline` (time.perf_counter value), the request timeout
+    never goes past it, and the download is abandoned with
+    LifetimeExceeded when it is reached between two chunks.
+
+    Requests wait for the RateLimiter, and are retried once after
+    the delay given by a 429 or 503 Retry-After header.
+    """
+    cache = _cache
+    entry = cache.lookup(url) if cache else None
+    if entry and entry.is_fresh(cache.ttl):
+        return Page(url, entry.status, entry.body, 0)
+
+    request_headers = dict(headers or {})
+    if entry:
+        request_headers.update(entry.validators())
+    with _get(url, timeout, request_headers, deadline) as response:
+        #Page unchanged since the cached version
+        if entry and response.status_code == 304:
+            cache.refresh(entry)
+            return Page(url, entry.status, entry.body, 0)
+
+        #Don't download the body of an error page
+        if response.status_code != 200:
+            return Page(url, response.status_code, "", 0)
+
+        text, size = _read_html(response, max_size, deadline)
+
+    if cache:
+        cache.store(CacheEntry(url, response.status_code, text,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified")))
+    return Page(url, response.status_code, text, size)
+
+def fetch_resource(url, timeout, headers=None, max_size=MAX_PAGE_SIZE,
+        deadline=None):
+    """
+    GET a non html resource (robots.txt, sitemaps...), without
+    the ResponseCache.
+
+    return: Page with the raw body as bytes, truncated
+    after `max_size` bytes.
+    """
+    with _get(url, timeout, dict(headers or {}), deadline) as response:
+        if response.status_code != 200:
+            return Page(url, response.status_code, b"", 0)
+        body = _read_body(response, max_size, deadline)
+    return Page(url, response.status_code, bytes(body), len(body))
+
+def _get(url, timeout, headers, deadline):
+    """
+    Send a streamed GET request once allowed by the RateLimiter,
+    honoring Retry-After of 429 and 503 answers.
+    """
+    limiter = _limiter
+    for attempt in range(RETRY_ATTEMPTS + 1):
+        if limiter:
+            limiter.acquire(url, deadline)
+        request_timeout = timeout
+        if deadline is not None:
+            request_timeout = min(timeout, remaining_time(deadline))
+        response = get_session().get(url, timeout=request_timeout,
+                headers=headers, stream=True)
+        if response.status_code not in RETRY_STATUS or not limiter:
+            return response
+        delay = limiter.retry_after(url, response.headers.get("Retry-After"))
+        if delay is None or attempt == RETRY_ATTEMPTS:
+            return response
+        response.close()
+
+def _iter_body(response):
+    """
+    Generate chunks of a streamed body as soon as they are received.
+
+    iter_content waits for a full CHUNK_SIZE, which a trickling server
+    can delay far beyond any deadline: read a single network read
+    at a time when urllib3 allows it.
+
+    Raw reads bypass requests exception wrapping: network errors
+    (read timeout, truncated body...) are raised as UrlException.
+    """
+    read1 = getattr(response.raw, "read1", None)
+    if read1 is None:
+        yield from response.iter_content(CHUNK_SIZE)
+        return
+    try:
+        chunk = read1(CHUNK_SIZE, decode_content=True)
+        while chunk:
+            yield chunk
+            chunk = read1(CHUNK_SIZE, decode_content=True)
+    except (Urllib3Error, OSError) as Error:
+        raise UrlException(f"{response.url}: {Error}") from Error
+
+def _read_html(response, max_size, deadline=None):
+    """
+    Read the body of an html response by chunks, up to
+    max_size bytes, and before the deadline.
+    return: (decoded text, number of bytes read)
+    """
+    content_type = response.headers.get("Content-Type", "text/html")
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type not in HTML_CONTENT_TYPES:
+        raise ContentError(f"{response.url}: not html ({content_type})")
+
+    body = _read_body(response, max_size, deadline)
+    return body.decode(response.encoding or "utf-8", errors="replace"), \
+            len(body)
+
+def _read_body(response, max_size, deadline=None):
+    """
+    Read a streamed body up to max_size bytes, before the deadline.
+    """
+    body = bytearray()
+    for chunk in _iter_body(response):
+        body += chunk
+        #Slow servers can't hold a fetch past its deadline
+        if deadline is not None:
+            remaining_time(deadline)
+        if len(body) >= max_size:
+            del body[max_size:]
+            break
+    return body
@@ -1,17 +1,18 @@
-import requests
 from requests.exceptions import SSLError, ConnectionError, Timeout, \
-        TooManyRedirects, InvalidSchema
+        TooManyRedirects, InvalidSchema, RequestException
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import urllib.parse as URLParse
-import os.path
-import re
 import sys
 import time
 
-from .errors import UrlException, LifetimeExceeded
-from .link import LinkParser
-
-MAIL_REGEX = "[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"
-MAIL_REGEX = re.compile(MAIL_REGEX)
+from .analyzer import analyze
+from .duplicate import TemplateDetector, url_pattern
+from .errors import UrlException, LifetimeExceeded, failure_class
+from .frontier import Frontier, VisitedSet
+from .metrics import SiteMetrics
+from .session import fetch, fetch_resource, remaining_time, MAX_PAGE_SIZE
+from .sitemap import parse_robots, parse_sitemap, MAX_SITEMAP_SIZE
+from .url import canonical_url, same_host
 
 MEDIA_EXTENSIONS = ['svg', 'png', 'jpg', 'jpeg', 'mp3', 'mp4',
         "gif"]
@@ -21,12 +22,6 @@ def is_url(parsed_url):
     """ Check if the given string is an url """
     return all([parsed_url.scheme, parsed_url.netloc])
 
-def retrieve_email(html_content):
-    """
-    Find all emails within an html page.
-    """
-    return set(MAIL_REGEX.findall(html_content))
-
 class Site:
     """
     Parse a single website to retrieve email information,
@@ -38,34 +33,73 @@ class Site:
 
     Control email quality (see _clean_mails) to keep most accurate
     mail.
+
+    The whole search is limited to `lifetime` seconds (LIFETIME by
+    default): fetches in flight when it runs out are abandoned.
+
+    With USE_SITEMAP, robots.txt and sitemaps are read first to
+    explore likely contact pages with the homepage, and robots.txt
+    disallow rules are respected.
+
+    Fetches, outcome and duration of the search are recorded
+    in a SiteMetrics.
+
+    With PRUNE_TEMPLATES, url patterns producing near duplicate
+    pages (calendars, playlists, pagination...) are detected, and
+    their remaining urls are dropped from the frontiers.
+
+    Memory of a site is bounded: explored urls are stored as
+    hashes, frontiers keep the FRONTIER_SIZE best urls and up to
+    MAX_RAW_MAILS mails unrelated to the domain are kept.
     """
     DESPERATE = 0
     NORMAL = 1
     MAX_LEVEL = 3
     MAX_UNSURE = 5
     LIFETIME = 30
+    FETCH_CONCURRENCY = 8
+    MAX_PAGE_SIZE = MAX_PAGE_SIZE
+    USE_SITEMAP = False
+    MAX_SITEMAPS = 5
+    MAX_SITEMAP_SIZE = MAX_SITEMAP_SIZE
+    SITEMAP_SEEDS = 20
+    FRONTIER_SIZE = Frontier.DEFAULT_MAX_SIZE
+    MAX_RAW_MAILS = 200
+    PRUNE_TEMPLATES = True
 
     HEADERS = {
             'User-Agent': 'Mozilla/5.0 Gecko/41.0 Firefox/41.0',
             }
-    def __init__(self, url):
+    def __init__(self, url, lang="en", lifetime=None):
         #General information
+        self.lang = lang
         self.homepage = True
         self.mode = self.NORMAL
         self.creation = time.perf_counter()
-
-        #Url related
+        self.lifetime = self.LIFETIME if lifetime is None else lifetime
+        self.deadline = self.creation + self.lifetime
+        #Error raised while fetching the homepage
+        self.error = None
+        #robots.txt rules, when read
+        self.robots = None
+        self.templates = TemplateDetector()
+        self.metrics = SiteMetrics(url)
+
+        #Url related, navigated_url store canonical urls
         self.base_url = None
-        self.navigated_url = set()
+        self.navigated_url = VisitedSet()
         self.to_navigate_url = None
 
         #Mail related
         self._mails_raw = set()
+        #Mails of mailto links, preferred as unsure mails
+        self._mailto = set()
         self.unsure_mails = set()
         self.domain_mails = set()
 
         self._get_base_url(url)
-        self.to_navigate_url = {self.base_url.geturl()}
+        self.to_navigate_url = Frontier(self.lang, self.FRONTIER_SIZE)
+        self.to_navigate_url.push(self.base_url.geturl())
 
         self.domain = self.base_url.netloc
         if self.domain.startswith("www."):
@@ -87,11 +121,17 @@ class Site:
 
         Expect also to get domain email from DESPERATE search,
         otherwise keep some founded emails.
+
+        Pages are explored by decreasing probability of being a
+        contact page, and the search stop at the first domain email.
         """
         print("Parse : ", self.base_url.geturl())
+        if self.USE_SITEMAP:
+            self._seed_sitemaps()
         #Start with normal mode.
         self._site_loop()
         if self._clean_mails():
+            self._end_metrics(SiteMetrics.NORMAL)
             return None
 
         #Change to desperate mode
@@ -99,6 +139,16 @@ class Site:
         self.to_navigate_url = self._cached_url
         self._site_loop()
         self._clean_mails(save_unsure=True)
+        if self.domain_mails:
+            self._end_metrics(SiteMetrics.DESPERATE)
+        elif self.unsure_mails:
+            self._end_metrics(SiteMetrics.UNSURE)
+        else:
+            self._end_metrics(SiteMetrics.NONE)
+
+    def _end_metrics(self, outcome):
+        self.metrics.outcome = outcome
+        self.metrics.duration = time.perf_counter() - self.creation
 
     def _get_base_url(self, url):
         """ Prepare the host url to get the root folder /."""
@@ -121,113 +171,307 @@ class Site:
         Loop over differents pages of the website, depending
         of the NORMAL or DESPERATE mode.
 
-        Fetch an url, find emails in html content, and store
-        internal links of the page to be parsed later.
+        Fetch all urls of a level, find emails in html content,
+        and store internal links of the pages to be parsed
+        at the next level.
         """
         nesting_level = 0
-        self._cached_url = set()
+        self._cached_url = Frontier(self.lang, self.FRONTIER_SIZE)
         while len(self.to_navigate_url):
-            url = self.to_navigate_url.pop()
-            try:
-                content = self._parse_url(url)
-            except (UrlException, LifetimeExceeded) as Error:
-                if self.homepage:
-                    print(f"{url}: can't GET website '{Error}'", \
-                            file=sys.stderr)
-                continue
-
-            #Store mail like element of the page
-            self._mails_raw |= retrieve_email(content)
-
-            #Try to add extra links for a research
-            self._cached_url |= self._manage_links(content)
+            if not self._level_loop():
+                return
 
             #Go deeper into the website, starting by searching
             #all link of an homepage, all links from those links etc.
-            if len(self.to_navigate_url) == 0:
-                #Behave differently in DESPERATE or NORMAL mode.
-                #
-                #- For normal mode, parse all link of the homepage.
-                #- For desperate mode, find link of link for multiple
-                #level, specified by MAX_LEVEL
-                if not nesting_level < self.MAX_LEVEL:
-                    return
-                if self.mode == Site.NORMAL and not self.homepage:
-                    return
-                nesting_level += 1
-                self.to_navigate_url = self._cached_url
-                self._cached_url = set()
-                self.homepage = False
-
-
-    def _convert_site_url(self, url:str):
-        """
-        Convert an url to a ParseResult. Control
-        if it's a valid link, and if it's pointing
-        to the website.
+            #
+            #Behave differently in DESPERATE or NORMAL mode.
+            #
+            #- For normal mode, parse all link of the homepage.
+            #- For desperate mode, find link of link for multiple
+            #level, specified by MAX_LEVEL
+            if not nesting_level < self.MAX_LEVEL:
+                return
+            if self.mode == Site.NORMAL and not self.homepage:
+                return
+            nesting_level += 1
+            self.to_navigate_url = self._cached_url
+            self._cached_url = Frontier(self.lang, self.FRONTIER_SIZE)
+            self.homepage = False
+
+    def _level_loop(self):
+        """
+        Fetch concurrently all urls of the current level, keeping
+        up to FETCH_CONCURRENCY requests in flight, the most
+        promising urls first.
+
+        Pages are analysed as soon as they are received.
+        Return False when the exploration must stop: site lifetime
+        exceeded or domain email found. Fetches still in flight at the
+        deadline are abandoned, so the site never outlives it.
+        """
+        alive = True
+        in_flight = {}
+        pool = ThreadPoolExecutor(max_workers=self.FETCH_CONCURRENCY)
+        try:
+            while len(self.to_navigate_url) or len(in_flight):
+                #Fill free slots with urls not already explored
+                while len(self.to_navigate_url) and \
+                        len(in_flight) < self.FETCH_CONCURRENCY:
+                    url = self.to_navigate_url.pop()
+                    if canonical_url(url) in self.navigated_url:
+                        continue
+                    if not self._allowed(url):
+                        continue
+                    self.navigated_url.add(canonical_url(url))
+                    in_flight[pool.submit(self._explore_url, url)] = url
+                if not len(in_flight):
+                    break
+
+                try:
+                    timeout = remaining_time(self.deadline)
+                except LifetimeExceeded:
+                    timeout = 0
+                done, _ = wait(in_flight, timeout=timeout,
+                        return_when=FIRST_COMPLETED)
+                #Site LIFETIME exceeded while waiting for pages
+                if not done:
+                    self._lifetime_exceeded()
+                    return False
+
+                for future in done:
+                    url = in_flight.pop(future)
+                    try:
+                        analysis = future.result()
+                    except LifetimeExceeded:
+                        self._lifetime_exceeded()
+                        alive = False
+                        continue
+                    except UrlException as Error:
+                        if self.homepage and url == self.base_url.geturl():
+                            self.error = Error
+                            print(f"{url}: can't GET website '{Error}'", \
+                                    file=sys.stderr)
+                        continue
+
+                    #Store mail like element of the page
+                    self._add_mails(analysis.emails, analysis.mailto)
+
+                    #Drop siblings of near duplicate pages
+                    if self.PRUNE_TEMPLATES and \
+                            self.templates.add(url, analysis.sketch):
+                        self._prune_template(url)
+
+                    #Try to add extra links for a research
+                    self._cached_url.update(self._manage_links(analysis.links,
+                            url))
+
+                    #Stop as soon as the site mail is known
+                    if self._check_domain_mails():
+                        if self.metrics.first_domain_mail is None:
+                            self.metrics.first_domain_mail = \
+                                    time.perf_counter() - self.creation
+                        self.to_navigate_url.clear()
+                        alive = False
+        finally:
+            #Don't wait for abandoned fetches, they stop by themselves
+            #at their deadline
+            for future in in_flight:
+                future.cancel()
+            pool.shutdown(wait=False)
+        return alive
+
+    def _lifetime_exceeded(self):
+        """
+        Stop the exploration at the site deadline. A site which
+        didn't answer any page before it failed.
+        """
+        self.metrics.lifetime_exceeded = True
+        self.to_navigate_url.clear()
+        if self.error is None and not self.metrics.pages:
+            self.error = LifetimeExceeded("{}: no page received before "
+                    "the deadline".format(self.base_url.geturl()))
+
+    def _seed_sitemaps(self):
+        """
+        Read robots.txt and sitemaps of the site (following sitemap
+        indexes, up to MAX_SITEMAPS), and push the SITEMAP_SEEDS most
+        promising pages in the frontier, explored with the homepage.
+        """
+        base_url = self.base_url.geturl()
+        sitemaps, pages = [], []
+        try:
+            robots = self._fetch_resource(URLParse.urljoin(base_url,
+                "/robots.txt"))
+            if robots is not None:
+                self.robots, sitemaps = parse_robots(robots.decode("utf-8",
+                    errors="replace"))
+            if not sitemaps:
+                sitemaps = [URLParse.urljoin(base_url, "/sitemap.xml")]
+
+            for _ in range(self.MAX_SITEMAPS):
+                if not sitemaps:
+                    break
+                content = self._fetch_resource(sitemaps.pop(0),
+                        self.MAX_SITEMAP_SIZE)
+                if content is None:
+                    continue
+                page_urls, index_urls = parse_sitemap(content)
+                pages += page_urls
+                sitemaps += index_urls
+        except LifetimeExceeded:
+            return None
+
+        #Keep only pages looking like a contact or related page
+        seeds = []
+        for url in pages:
+            parsed_url = self._convert_site_url(url, base_url)
+            if not parsed_url:
+                continue
+            url = parsed_url.geturl()
+            score = self.to_navigate_url.score(url)
+            if score > 0:
+                seeds.append((score, url))
+        seeds.sort(reverse=True)
+        for _, url in seeds[:self.SITEMAP_SEEDS]:
+            self.to_navigate_url.push(url)
+
+    def _fetch_resource(self, url, max_size=None):
+        """
+        Body of a robots.txt or sitemap url, None when unavailable.
+        Truncated after `max_size` bytes, MAX_PAGE_SIZE by default.
+        """
+        try:
+            page = fetch_resource(url, timeout=10, headers=self.HEADERS,
+                    max_size=max_size or self.MAX_PAGE_SIZE,
+                    deadline=self.deadline)
+        except (RequestException, UrlException):
+            return None
+        return page.text if page.status == 200 else None
+
+    def _allowed(self, url):
+        """
+        Check robots.txt rules, when read.
+        """
+        if self.robots is None:
+            return True
+        return self.robots.can_fetch(self.HEADERS["User-Agent"], url)
+
+    def _convert_site_url(self, url:str, page_url:str):
+        """
+        Convert an url to a ParseResult, resolving relative
+        links from the page url. Control if it's a valid link,
+        and if it's pointing to the website.
         """
         #Remove image links
         if self._is_image(url):
             return None
 
-        parsed_url = URLParse.urlparse(url)
+        try:
+            parsed_url = URLParse.urlparse(URLParse.urljoin(page_url, url))
+        except ValueError:
+            #Malformed link, like an invalid IPv6 host
+            return None
+        if parsed_url.scheme not in ["http", "https"]:
+            return None
+        if not same_host(self.base_url.netloc, parsed_url.netloc):
+            return None
+        return parsed_url._replace(fragment="")
 
-        #Having an entire url in href
-        if is_url(parsed_url):
-            if self.base_url.netloc != parsed_url.netloc:
-                return None
-            if parsed_url.scheme not in ["http", "https"]:
-                return None
-            return parsed_url
+    def _explore_url(self, url):
+        """
+        Fetch an url and analyze its content, possibly in
+        the analysis process pool.
 
-        #Having only a path or a fragment
-        if parsed_url.path:
-            path = os.path.join(self.base_url.path, parsed_url.path)
-            path = os.path.normpath(path)
-            return self.base_url._replace(path=path)
+        return: PageAnalysis of the page, with internal links only
+        """
+        return analyze(self._parse_url(url), url)
 
     def _parse_url(self, url):
         """
-        Handler to get a website url. Control if the given
-        url isn't already explored.
+        Handler to get a website url. The request can't go
+        past the site deadline.
+
+        Run in a fetch worker, must not modify the Site state.
         """
-        actual_lifetime = time.perf_counter() - self.creation
-        if actual_lifetime > self.LIFETIME:
-            self.to_navigate_url = set()
-            self._clean_mails(save_unsure=True)
-            raise LifetimeExceeded("Parsing duration under LIFETIME")
+        remaining_time(self.deadline)
+        start = time.perf_counter()
+        try:
+            page = self._fetch_page(url)
+        except UrlException as Error:
+            self.metrics.failed(time.perf_counter() - start,
+                    failure_class(Error))
+            raise
+        if page.status == 200:
+            self.metrics.fetched(time.perf_counter() - start, page.size)
+            return page.text
+        self.metrics.failed(time.perf_counter() - start, f"HTTP {page.status}")
+        raise UrlException("{}: invalid url".format(url))
 
-        if url in self.navigated_url:
-            raise UrlException(f"'{url}' : url already navigated.")
-            
-        self.navigated_url |= {url}
+    def _fetch_page(self, url):
+        """
+        Fetch a page of the site, network errors are
+        raised as UrlException.
+        """
         try:
-            response = requests.get(url, timeout=10, \
-                    headers=self.HEADERS)
-        except (SSLError, ConnectionError, Timeout, TooManyRedirects, InvalidSchema) \
+            return fetch(url, timeout=10, headers=self.HEADERS,
+                    max_size=self.MAX_PAGE_SIZE, deadline=self.deadline)
+        except Timeout as Error:
+            #Timeout shortened by the deadline
+            remaining_time(self.deadline)
+            raise UrlException(f"{url}: {Error}") from Error
+        except (SSLError, ConnectionError, TooManyRedirects, InvalidSchema) \
                 as Error:
-            raise UrlException(f"{url}: {Error}")
-        if response.status_code == 200:
-            return response.text
-        raise UrlException("{}: invalid url".format(url))
+            raise UrlException(f"{url}: {Error}") from Error
 
-    def _manage_links(self, html_content):
+    def _manage_links(self, link_list, page_url):
         """
         Retrieve all link of a given page who is pointing
-        to an other page of the site 
-        """
-        #Extract all link of a html page
-        parser = LinkParser()
-        link_list = parser.parse_links(html_content)
+        to an other page of the site, not already explored and
+        not a sibling of near duplicate pages.
 
+        return: list of (url, anchor text)
+        """
         #Retrieve all links related to the website
         website_links = []
-        for link in link_list:
-            formatted_link = self._convert_site_url(link)
-            if formatted_link:
-                website_links.append(formatted_link)
+        for link, text in link_list:
+            formatted_link = self._convert_site_url(link, page_url)
+            if not formatted_link:
+                continue
+            formatted_link = formatted_link.geturl()
+            if canonical_url(formatted_link) in self.navigated_url:
+                continue
+            if self.templates.is_templated(formatted_link) and \
+                    self._cached_url.score(formatted_link, text) <= 0:
+                self.metrics.pruned_urls += 1
+                continue
+            website_links.append((formatted_link, text))
+        return website_links
+
+    def _prune_template(self, url):
+        """
+        Remove from the frontiers urls with the pattern of a
+        templated url, except those looking like a contact or
+        related page.
+        """
+        pattern = url_pattern(url)
+        def is_sibling(sibling_url, score):
+            return score <= 0 and url_pattern(sibling_url) == pattern
+        self.metrics.pruned_urls += self.to_navigate_url.prune(is_sibling) \
+                + self._cached_url.prune(is_sibling)
 
-        return {link.geturl() for link in website_links}
+    def _add_mails(self, emails, mailto):
+        """
+        Store mails of a page. Once MAX_RAW_MAILS are stored, only
+        mails of the domain are added.
+        """
+        #Mails of mailto links first
+        for mail in sorted(emails, key=lambda mail: mail not in mailto):
+            if len(self._mails_raw) >= self.MAX_RAW_MAILS and \
+                    mail.split("@")[1] != self.domain:
+                continue
+            self._mails_raw.add(mail)
+            if mail in mailto:
+                self._mailto.add(mail)
 
     def _check_domain_mails(self):
         """
@@ -250,7 +494,8 @@ class Site:
         self._mails_raw = {mail for mail in self._mails_raw \
                 if not self._is_image(mail)}
         if not self._check_domain_mails() and save_unsure:
-            self.unsure_mails = list(self._mails_raw)[:self.MAX_UNSURE]
+            self.unsure_mails = sorted(self._mails_raw,
+                    key=lambda mail: mail not in self._mailto)[:self.MAX_UNSURE]
             self.unsure_mails = set(self.unsure_mails)
         return len(self.domain_mails)
 
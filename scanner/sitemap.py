@@ -0,0 +1,75 @@
+from urllib.robotparser import RobotFileParser
+import io
+import re
+import xml.etree.ElementTree as ElementTree
+import zlib
+
+#Maximum size of a downloaded or decompressed sitemap
+MAX_SITEMAP_SIZE = 10 * 1024 * 1024
+#Maximum number of urls kept from a single sitemap
+MAX_SITEMAP_URLS = 50000
+
+SITEMAP_LINE_REGEX = re.compile(r"^\s*sitemap\s*:\s*(\S+)", re.I | re.M)
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def parse_robots(text):
+    """
+    Parse a robots.txt content.
+
+    return: (RobotFileParser with the disallow rules, list of
+    sitemap urls announced by the file)
+    """
+    robots = RobotFileParser()
+    robots.parse(text.splitlines())
+    return robots, SITEMAP_LINE_REGEX.findall(text)
+
+def _decompress(content):
+    """
+    Decompress a gzip sitemap, never beyond MAX_SITEMAP_SIZE.
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        return decompressor.decompress(content, MAX_SITEMAP_SIZE)
+    except zlib.error:
+        return b""
+
+def _local_name(tag):
+    """ Tag name without its xml namespace. """
+    return tag.rpartition("}")[2].lower()
+
+def parse_sitemap(content):
+    """
+    Parse a sitemap, possibly gzip compressed: an xml <urlset>,
+    an xml <sitemapindex>, or a text file with an url per line.
+    Urls of a sitemap truncated by the size limit are kept up to
+    the cut.
+
+    return: (page urls, sitemap urls of an index)
+    """
+    if content.startswith(GZIP_MAGIC):
+        content = _decompress(content)
+    if not content.lstrip().startswith(b"<"):
+        text = content.decode("utf-8", errors="replace")
+        urls = [line.strip() for line in text.splitlines()]
+        return [url for url in urls if url][:MAX_SITEMAP_URLS], []
+
+    #Parsed incrementally: <loc> read before a truncation are kept
+    pages, sitemaps = [], []
+    is_index = False
+    try:
+        for event, element in ElementTree.iterparse(io.BytesIO(content),
+                events=("start", "end")):
+            if event == "start":
+                if _local_name(element.tag) == "sitemapindex":
+                    is_index = True
+                continue
+            if _local_name(element.tag) == "loc" and element.text:
+                if is_index:
+                    sitemaps.append(element.text.strip())
+                elif len(pages) < MAX_SITEMAP_URLS:
+                    pages.append(element.text.strip())
+            element.clear()
+    except ElementTree.ParseError:
+        pass
+    return pages, sitemaps
@@ -0,0 +1,333 @@
+import csv
+import os
+import sqlite3
+import threading
+import time
+
+from .logger import LogRadio
+from .radio_info import RadioInfo
+from .url import canonical_host, parse_site
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sites (
+    id INTEGER PRIMARY KEY,
+    host TEXT NOT NULL UNIQUE,
+    error TEXT,
+    explored REAL,
+    page_count INTEGER
+);
+CREATE TABLE IF NOT EXISTS radios (
+    id INTEGER PRIMARY KEY,
+    section_id INTEGER NOT NULL REFERENCES sections(id),
+    site_id INTEGER NOT NULL REFERENCES sites(id),
+    name TEXT NOT NULL,
+    site TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    status TEXT,
+    lease_owner TEXT,
+    lease_expires REAL,
+    UNIQUE (section_id, name, site)
+);
+CREATE INDEX IF NOT EXISTS radios_site ON radios(site_id);
+CREATE INDEX IF NOT EXISTS radios_status ON radios(status);
+CREATE TABLE IF NOT EXISTS pages (
+    site_id INTEGER NOT NULL REFERENCES sites(id),
+    url TEXT NOT NULL,
+    UNIQUE (site_id, url)
+);
+CREATE TABLE IF NOT EXISTS mails (
+    radio_id INTEGER NOT NULL REFERENCES radios(id),
+    mail TEXT NOT NULL,
+    kind TEXT NOT NULL CHECK (kind IN ('domain', 'unsure')),
+    UNIQUE (radio_id, mail, kind)
+);
+CREATE INDEX IF NOT EXISTS mails_radio ON mails(radio_id);
+CREATE INDEX IF NOT EXISTS mails_mail ON mails(mail);
+"""
+
+
+class RadioDatabase:
+    """
+    SQLite storage of radio lists and scan results, as an
+    alternative to .template and .csv files.
+
+    Each thread uses its own connection, and the database runs
+    in WAL mode, allowing concurrent writers from multiple
+    workers or processes.
+
+    Exporters write the .template and .csv formats.
+
+    The database is also a work queue for CrawlWorker processes:
+    radios without result are leased for a limited time to a
+    single worker. Without `wal`, the database uses a rollback
+    journal, needed when it's shared between machines on a
+    network filesystem.
+    """
+    DOMAIN = "domain"
+    UNSURE = "unsure"
+    BUSY_TIMEOUT = 60
+
+    def __init__(self, filename, wal=True):
+        #Worker threads may connect from another working directory
+        self.filename = os.path.abspath(filename)
+        self.wal = wal
+        self._local = threading.local()
+        with self.connection as connection:
+            connection.executescript(SCHEMA)
+
+    @property
+    def connection(self):
+        """
+        Connection of the current thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.filename,
+                    timeout=self.BUSY_TIMEOUT)
+            connection.execute("PRAGMA journal_mode={}".format(
+                "WAL" if self.wal else "DELETE"))
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+        return connection
+
+    def _section_id(self, connection, section):
+        position = connection.execute(
+                "SELECT COUNT(*) FROM sections").fetchone()[0]
+        connection.execute("INSERT OR IGNORE INTO sections (name, position) "
+                "VALUES (?, ?)", (section, position))
+        return connection.execute("SELECT id FROM sections WHERE name = ?",
+                (section,)).fetchone()[0]
+
+    def _site_id(self, connection, site):
+        host = canonical_host(parse_site(site).netloc)
+        connection.execute("INSERT OR IGNORE INTO sites (host) VALUES (?)",
+                (host,))
+        return connection.execute("SELECT id FROM sites WHERE host = ?",
+                (host,)).fetchone()[0]
+
+    def _radio_id(self, connection, section, radio_info):
+        row = connection.execute("""
+            SELECT radios.id FROM radios
+            JOIN sections ON sections.id = radios.section_id
+            WHERE sections.name = ? AND radios.name = ? AND radios.site = ?
+            """, (section, radio_info.name, radio_info.site)).fetchone()
+        return row[0] if row else None
+
+    def import_dataset(self, radio_dataset):
+        """
+        Store the radios of a LogRadio.radio_dataset, with their mails.
+        Already stored radios are kept.
+        """
+        with self.connection as connection:
+            for section in radio_dataset:
+                section_id = self._section_id(connection, section)
+                for position, radio_info in \
+                        enumerate(radio_dataset[section]):
+                    site_id = self._site_id(connection, radio_info.site)
+                    connection.execute("""
+                        INSERT OR IGNORE INTO radios
+                        (section_id, site_id, name, site, position)
+                        VALUES (?, ?, ?, ?, ?)
+                        """, (section_id, site_id, radio_info.name,
+                            radio_info.site, position))
+                    radio_id = self._radio_id(connection, section, radio_info)
+                    self._insert_mails(connection, radio_id, radio_info)
+
+    def import_template(self, filename):
+        """
+        Store radios of a .template (or .csv) file.
+        """
+        self.import_dataset(LogRadio(filename).radio_dataset)
+
+    @classmethod
+    def _insert_mails(cls, connection, radio_id, radio_info):
+        mails = [(radio_id, mail, cls.DOMAIN) for mail in \
+                radio_info.domain_mails]
+        mails += [(radio_id, mail, cls.UNSURE) for mail in \
+                radio_info.unsure_mails]
+        connection.executemany("INSERT OR IGNORE INTO mails "
+                "(radio_id, mail, kind) VALUES (?, ?, ?)", mails)
+
+    def record(self, section, radio_info, status, pages=(), error=None,
+            page_count=None):
+        """
+        Store the result of an explored radio: mails, fetched
+        pages and homepage error of its site.
+
+        `pages` may be a truncated sample of the `page_count`
+        fetched pages (see VisitedSet), all pages by default.
+        """
+        pages = list(pages)
+        if page_count is None:
+            page_count = len(pages)
+        with self.connection as connection:
+            section_id = self._section_id(connection, section)
+            site_id = self._site_id(connection, radio_info.site)
+            radio_id = self._radio_id(connection, section, radio_info)
+            if radio_id is None:
+                position = connection.execute("SELECT COUNT(*) FROM radios "
+                        "WHERE section_id = ?", (section_id,)).fetchone()[0]
+                radio_id = connection.execute("""
+                    INSERT INTO radios
+                    (section_id, site_id, name, site, position)
+                    VALUES (?, ?, ?, ?, ?)
+                    """, (section_id, site_id, radio_info.name,
+                        radio_info.site, position)).lastrowid
+            connection.execute("UPDATE radios SET status = ?, "
+                    "lease_owner = NULL, lease_expires = NULL WHERE id = ?",
+                    (status, radio_id))
+            self._insert_mails(connection, radio_id, radio_info)
+
+            connection.execute("UPDATE sites SET error = ?, explored = ?, "
+                    "page_count = ? WHERE id = ?", (error and str(error),
+                    time.time(), page_count, site_id))
+            connection.executemany("INSERT OR IGNORE INTO pages "
+                    "(site_id, url) VALUES (?, ?)",
+                    [(site_id, url) for url in pages])
+
+    def lease(self, owner, count=1, duration=120):
+        """
+        Lease up to `count` radios without result, and not leased by
+        another worker, to `owner` for `duration` seconds. Expired
+        leases of a crashed worker are given to another one.
+
+        return: list of (section, RadioInfo)
+        """
+        now = time.time()
+        expires = now + duration
+        with self.connection as connection:
+            connection.execute("""
+                UPDATE radios SET lease_owner = ?, lease_expires = ?
+                WHERE id IN (
+                    SELECT radios.id FROM radios
+                    JOIN sections ON sections.id = radios.section_id
+                    WHERE radios.status IS NULL
+                    AND (radios.lease_expires IS NULL
+                         OR radios.lease_expires < ?)
+                    ORDER BY sections.position, radios.position
+                    LIMIT ?)
+                """, (owner, expires, now, count))
+            rows = connection.execute("""
+                SELECT sections.name, radios.id, radios.name, radios.site
+                FROM radios
+                JOIN sections ON sections.id = radios.section_id
+                WHERE radios.lease_owner = ? AND radios.lease_expires = ?
+                AND radios.status IS NULL
+                """, (owner, expires)).fetchall()
+
+            leased = []
+            for section, radio_id, name, site in rows:
+                mails = connection.execute("SELECT mail, kind FROM mails "
+                        "WHERE radio_id = ?", (radio_id,)).fetchall()
+                radio_info = RadioInfo(name, site)
+                radio_info.domain_mails = {mail for mail, kind in mails \
+                        if kind == self.DOMAIN}
+                radio_info.unsure_mails = {mail for mail, kind in mails \
+                        if kind == self.UNSURE}
+                leased.append((section, radio_info))
+        return leased
+
+    def postpone(self, section, radio_info, until):
+        """
+        Release a leased radio without result, not leased again
+        before `until` (time.time value).
+        """
+        with self.connection as connection:
+            radio_id = self._radio_id(connection, section, radio_info)
+            connection.execute("UPDATE radios SET lease_owner = NULL, "
+                    "lease_expires = ? WHERE id = ?", (until, radio_id))
+
+    def pending_count(self):
+        """
+        Number of radios without result, leased or not.
+        """
+        return self.connection.execute("SELECT COUNT(*) FROM radios "
+                "WHERE status IS NULL").fetchone()[0]
+
+    def restore(self, radio_dataset):
+        """
+        Apply stored mails to the RadioInfo of a
+        LogRadio.radio_dataset.
+        """
+        mails = {}
+        for section, name, site, domain_mails, unsure_mails in self.radios():
+            mails[(section, name, site)] = (domain_mails, unsure_mails)
+        for section in radio_dataset:
+            for radio_info in radio_dataset[section]:
+                key = (section, radio_info.name, radio_info.site)
+                if key in mails:
+                    radio_info.update_mails(*mails[key])
+
+    def radios(self):
+        """
+        Generate all radios as (section, name, site, domain mails,
+        unsure mails), in the order of their lists.
+        """
+        rows = self.connection.execute("""
+            SELECT sections.name, radios.name, radios.site,
+                   GROUP_CONCAT(CASE WHEN mails.kind = 'domain'
+                                THEN mails.mail END, ', '),
+                   GROUP_CONCAT(CASE WHEN mails.kind = 'unsure'
+                                THEN mails.mail END, ', ')
+            FROM radios
+            JOIN sections ON sections.id = radios.section_id
+            LEFT JOIN mails ON mails.radio_id = radios.id
+            GROUP BY radios.id
+            ORDER BY sections.position, radios.position
+            """)
+        for section, name, site, domain_mails, unsure_mails in rows:
+            yield section, name, site, domain_mails or "", unsure_mails or ""
+
+    def radios_without_mails(self):
+        """
+        Retrieve radios without any mail, as (section, name, site).
+        """
+        return self.connection.execute("""
+            SELECT sections.name, radios.name, radios.site
+            FROM radios
+            JOIN sections ON sections.id = radios.section_id
+            WHERE NOT EXISTS (SELECT 1 FROM mails
+                              WHERE mails.radio_id = radios.id)
+            ORDER BY sections.position, radios.position
+            """).fetchall()
+
+    def export_template(self, filename):
+        """
+        Write all radios in the .template format.
+        """
+        with open(filename, "w", encoding="utf8", newline="") as stream:
+            writer = csv.writer(stream, delimiter=";")
+            current_section = None
+            for section, name, site, _, _ in self.radios():
+                if section != current_section:
+                    writer.writerow([section, "", "", ""])
+                    current_section = section
+                writer.writerow([name, site, "", ""])
+
+    def export_csv(self, filename):
+        """
+        Write radios having mails in the .csv format of LogRadio.
+        """
+        with open(filename, "w", newline="") as stream:
+            writer = csv.writer(stream, delimiter=";")
+            writer.writerow(LogRadio.COLUMNS)
+            current_section = None
+            for section, name, site, domain_mails, unsure_mails \
+                    in self.radios():
+                if not domain_mails and not unsure_mails:
+                    continue
+                if section != current_section:
+                    writer.writerow([section, "", "", ""])
+                    current_section = section
+                writer.writerow([name, site, domain_mails, unsure_mails])
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,74 @@
+import posixpath
+import urllib.parse as URLParse
+
+DEFAULT_PORTS = {
+    "http" : "80",
+    "https" : "443",
+    }
+
+
+def canonical_host(netloc):
+    """
+    Normalize the host part of an url: lowercase, without
+    credentials, default port, trailing dot and 'www.' prefix.
+    """
+    netloc = netloc.rpartition("@")[2].lower()
+    host, _, port = netloc.partition(":")
+    host = host.rstrip(".")
+    if host.startswith("www."):
+        host = host[len("www."):]
+    if port and port not in DEFAULT_PORTS.values():
+        return f"{host}:{port}"
+    return host
+
+def canonical_path(path):
+    """
+    Resolve dot segments and remove the trailing slash of a path.
+    """
+    if not path:
+        return "/"
+    path = posixpath.normpath(path)
+    #normpath keep a leading double slash
+    return "/" + path.lstrip("/")
+
+def canonical_url(url):
+    """
+    Convert an url in a canonical form, identical for all
+    urls pointing to the same page:
+    - http and https are the same scheme
+    - host without 'www.' and default port
+    - path without dot segments and trailing slash
+    - query parameters sorted
+    - no fragment
+
+    Used as key to know if a page was already explored,
+    not as an url to fetch.
+    """
+    parsed_url = URLParse.urlsplit(url.strip())
+    scheme = parsed_url.scheme.lower()
+    if scheme == "https":
+        scheme = "http"
+    query = [param for param in parsed_url.query.split("&") if param]
+    return URLParse.urlunsplit((
+        scheme,
+        canonical_host(parsed_url.netloc),
+        canonical_path(parsed_url.path),
+        "&".join(sorted(query)),
+        "",
+        ))
+
+def parse_site(site):
+    """
+    Split the site of a radio, written with or without
+    its scheme in templates.
+    """
+    site = site.strip()
+    if "//" not in site:
+        site = "//" + site
+    return URLParse.urlsplit(site)
+
+def same_host(netloc, other_netloc):
+    """
+    Check if two url netloc are pointing to the same website.
+    """
+    return canonical_host(netloc) == canonical_host(other_netloc)
@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import socket
+import time
+import uuid
+
+from .crawler import CrawlEngine, explore_radio
+from .health import site_key
+from .site import Site
+
+
+class CrawlWorker:
+    """
+    Explore radio websites leased from a RadioDatabase used as
+    work queue, shared by workers of several processes or machines.
+
+    Each of the `concurrency` threads leases a single radio at a
+    time, explores its site and stores the result like CrawlEngine,
+    until no radio is left. A radio leased by a crashed worker is
+    explored by another one once its lease expires.
+
+    With `max_run_time`, no radio is leased once the time is over,
+    and sites never outlive it. With a SiteHealth, radios of sites
+    in their failure backoff delay stay in the queue, not leased
+    again before the end of their backoff.
+
+    Metrics of each explored site are added to a CrawlMetrics.
+    """
+    DEFAULT_CONCURRENCY = CrawlEngine.DEFAULT_CONCURRENCY
+    #Lease duration, a site never outlives its LIFETIME
+    LEASE_DURATION = Site.LIFETIME * 4
+
+    def __init__(self, database, concurrency=DEFAULT_CONCURRENCY, lang="en",
+            lease_duration=LEASE_DURATION, metrics=None, health=None,
+            max_run_time=None):
+        self.database = database
+        self.concurrency = max(1, concurrency)
+        self.lang = lang
+        self.lease_duration = lease_duration
+        self.metrics = metrics
+        self.health = health
+        self.max_run_time = max_run_time
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        self._deadline = None
+
+    def run(self):
+        """
+        Explore leased radios until the queue is empty, or the
+        run time is over.
+        return: number of radios explored by this worker.
+        """
+        if self.max_run_time is not None:
+            self._deadline = time.perf_counter() + self.max_run_time
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = [pool.submit(self._work) for _ in range(self.concurrency)]
+            return sum(future.result() for future in futures)
+
+    def _site_lifetime(self):
+        """
+        Duration allowed to the next site.
+        return: None without run budget, 0 when the run is over.
+        """
+        if self._deadline is None:
+            return None
+        remaining = self._deadline - time.perf_counter()
+        if remaining <= 0:
+            return 0
+        return min(Site.LIFETIME, remaining)
+
+    def _work(self):
+        explored = 0
+        while True:
+            lifetime = self._site_lifetime()
+            if lifetime == 0:
+                return explored
+            leased = self.database.lease(self.owner, 1, self.lease_duration)
+            if not leased:
+                return explored
+            section, radio_info = leased[0]
+            status = explore_radio(section, radio_info, self.lang, lifetime,
+                    database=self.database, health=self.health,
+                    metrics=self.metrics)
+            if status is None:
+                self.database.postpone(section, radio_info,
+                        self.health.retry_time(site_key(radio_info.site)))
+                continue
+            explored += 1
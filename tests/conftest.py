@@ -0,0 +1,49 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import socket
+import threading
+
+import pytest
+
+#Pages of the radio site served by the `server` fixture
+PAGES = {
+    "/" : """<html><a href="http://[oops/">Broken</a>"""
+        """<a href="/contact">Contact</a></html>""",
+    "/contact" : """<html>Write to contact@radio.fm</html>""",
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        content = PAGES.get(self.path)
+        if content is None:
+            self.send_error(404)
+            return
+        body = content.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield "localhost:{}".format(httpd.server_address[1])
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def silent_server():
+    """
+    Server accepting connections without ever answering.
+    """
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(16)
+    yield "127.0.0.1:{}".format(listener.getsockname()[1])
+    listener.close()
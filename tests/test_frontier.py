@@ -0,0 +1,38 @@
+import pytest
+
+from scanner.frontier import CONTACT_SCORE, RELATED_SCORE, keywords, \
+        score_link
+
+CONTACT, RELATED = keywords("fr")
+
+
+def score(url, text=""):
+    return score_link(url, text, CONTACT, RELATED)
+
+@pytest.mark.parametrize("url, text, expected", [
+    ("http://radio.test/contact", "", CONTACT_SCORE),
+    ("http://radio.test/contact.html", "", CONTACT_SCORE),
+    ("http://radio.test/nous_contacter/", "", CONTACT_SCORE),
+    ("http://radio.test/page", "Contactez nous", CONTACT_SCORE),
+    ("http://radio.test/page", "Get in touch", CONTACT_SCORE),
+    ("http://radio.test/our-team", "", RELATED_SCORE),
+    ("http://radio.test/page", "About us", RELATED_SCORE),
+    ("http://radio.test/a-propos", "", RELATED_SCORE),
+    ("http://radio.test/advertising", "", RELATED_SCORE),
+    ("http://radio.test/steam", "", 0),
+    ("http://radio.test/page", "Steam sales", 0),
+    ("http://radio.test/contactless-payment", "", 0),
+    ("http://radio.test/aboutique", "", 0),
+    ("http://radio.test/propos", "", 0),
+    ])
+def test_whole_words(url, text, expected):
+    depth = len([part for part in url.split("/")[3:] if part])
+    assert score(url, text) == pytest.approx(expected - depth * 0.1)
+
+def test_contact_and_related():
+    assert score("http://radio.test/about/contact") == \
+            pytest.approx(CONTACT_SCORE + RELATED_SCORE - 0.2)
+
+def test_no_keywords():
+    assert score_link("http://radio.test/contact", "", frozenset(),
+            frozenset()) == pytest.approx(-0.1)
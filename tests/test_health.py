@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from scanner.crawler import CrawlEngine
+from scanner.health import SiteHealth, site_key
+from scanner.radio_info import RadioInfo
+
+
+def test_backoff(tmp_path):
+    health = SiteHealth(str(tmp_path / "health.db"), ttl=10)
+    assert [health.backoff(failures) for failures in range(4)] == \
+            [0, 10, 20, 40]
+    health.ttl = health.MAX_BACKOFF
+    assert health.backoff(3) == health.MAX_BACKOFF
+
+def test_failures(tmp_path):
+    health = SiteHealth(str(tmp_path / "health.db"))
+    key = site_key("https://www.radio.test/live")
+    assert not health.should_skip(key)
+    health.record_failure(key, "ConnectionError")
+    health.record_failure(key, "Timeout")
+    assert health.failures(key) == 2
+    assert health.status(key)[0] == "Timeout"
+    assert health.should_skip(key)
+    health.record_success(key)
+    assert health.failures(key) == 0
+    assert not health.should_skip(key)
+
+def test_crawl_skips_failing_sites(tmp_path):
+    health = SiteHealth(str(tmp_path / "health.db"), ttl=3600)
+    engine = CrawlEngine(SimpleNamespace(journalfile=str(tmp_path / "log")),
+            health=health)
+    radios = [RadioInfo(name, f"http://{name}.test") \
+            for name in ["healthy", "skipped", "retried"]]
+    for name in ["skipped", "retried", "retried"]:
+        health.record_failure(site_key(f"http://{name}.test"), "Timeout")
+    #Backoff of the retried site is over
+    health.connection.execute("UPDATE site_health SET failed_at = 0 "
+            "WHERE host = ?", (site_key("http://retried.test"),))
+    health.connection.commit()
+
+    pending = {"section" : 3}
+    to_explore = [("section", radio_info) for radio_info in radios]
+    explored = engine._check_health(to_explore, pending)
+    assert [radio_info.name for _, radio_info in explored] == \
+            ["healthy", "retried"]
+    assert pending == {"section" : 2}
@@ -0,0 +1,51 @@
+from scanner.journal import ScanJournal
+from scanner.radio_info import RadioInfo
+
+
+def radio(name):
+    return RadioInfo(name, f"http://{name}.test", {f"contact@{name}.test"})
+
+def test_resume(tmp_path):
+    filename = str(tmp_path / "journal")
+    journal = ScanJournal(filename)
+    journal.record("section", radio("first"))
+    journal.record("section", radio("second"), ScanJournal.FAILED)
+    journal.close()
+
+    journal = ScanJournal(filename, resume=True)
+    journal.close()
+    assert journal.completed[("section", "second", "http://second.test")]\
+            ["status"] == ScanJournal.FAILED
+    restored = RadioInfo("first", "http://first.test")
+    assert journal.restore("section", restored)
+    assert restored.domain_mails == {"contact@first.test"}
+
+def test_resume_after_truncated_line(tmp_path):
+    filename = str(tmp_path / "journal")
+    journal = ScanJournal(filename)
+    journal.record("section", radio("first"))
+    journal.close()
+    with open(filename, "a", encoding="utf8") as stream:
+        stream.write('{"section": "section", "radio": "sec')
+
+    journal = ScanJournal(filename, resume=True)
+    assert len(journal.completed) == 1
+    journal.record("section", radio("second"))
+    journal.close()
+
+    journal = ScanJournal(filename, resume=True)
+    journal.close()
+    assert sorted(name for _, name, _ in journal.completed) == \
+            ["first", "second"]
+
+def test_resume_truncated_first_line(tmp_path):
+    filename = str(tmp_path / "journal")
+    with open(filename, "w", encoding="utf8") as stream:
+        stream.write('{"section": ')
+    journal = ScanJournal(filename, resume=True)
+    journal.record("section", radio("first"))
+    journal.close()
+
+    journal = ScanJournal(filename, resume=True)
+    journal.close()
+    assert list(journal.completed) == [("section", "first", "http://first.test")]
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from scanner.analyzer import analyze_page
+from scanner.link import LinkParser, extract_links
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "benchmarks", "corpus")
+
+#Inline pages with edge cases of attributes and tags
+PAGES = [
+    """<a href=/unquoted class=tag>unquoted</a>""",
+    """<A HREF='/upper'>Upper <b>case</b></A>""",
+    """<a title="x > y" href="/quoted">quoted &amp; entity</a>""",
+    """<a href="/first"><a href="/nested">nested</a></a>""",
+    """<script>var a = '<a href="/script">';</script><a href="/after">""",
+    """<!-- <a href="/comment"> --><a href="/real">real</a>""",
+    """<a href="/eof">no end""",
+    """<a href""",
+    ]
+
+
+def corpus_pages():
+    return sorted(os.listdir(CORPUS_DIR))
+
+@pytest.mark.parametrize("name", corpus_pages())
+def test_corpus_links(name):
+    with open(os.path.join(CORPUS_DIR, name), encoding="utf8") as page:
+        content = page.read()
+    assert extract_links(content) == LinkParser().parse_links(content)
+
+@pytest.mark.parametrize("content", PAGES)
+def test_inline_links(content):
+    assert extract_links(content) == LinkParser().parse_links(content)
+
+def test_malformed_href():
+    analysis = analyze_page("""<a href="http://[oops/">broken</a>"""
+            """<a href="/contact">Contact</a>""", "http://radio.test/")
+    assert analysis.links == [("/contact", "Contact")]
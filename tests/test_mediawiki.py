@@ -0,0 +1,198 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import urllib.parse as URLParse
+
+import pytest
+
+from wikipedia import page as wiki_page
+from wikipedia.controller import SearchController
+from wikipedia.mediawiki import MediaWikiClient
+from wikipedia.page import PageInfo
+from wikipedia.wiki_error import ApiError, PageNotExists
+
+INFOBOX = "{{{{Infobox radio station\n| name = {0}\n" \
+        "| website = {{{{URL|http://{1}.test}}}}\n}}}}"
+
+
+class MockWiki:
+    """
+    Minimal MediaWiki action API, answering query requests like
+    the real one: normalized titles, redirects, missing pages, and
+    at most `page_limit` page contents per response, completed
+    with continuations.
+    """
+    def __init__(self, pages, redirects=None, page_limit=None):
+        self.pages = pages
+        self.redirects = redirects or {}
+        self.page_limit = page_limit
+        self.requests = []
+        self.fail = False
+
+    def query(self, params):
+        self.requests.append(params)
+        normalized, redirects, pages = [], [], []
+        for title in params["titles"].split("|"):
+            normal = title[:1].upper() + title[1:]
+            if normal != title:
+                normalized.append({"from" : title, "to" : normal})
+            if normal in self.redirects:
+                redirects.append({"from" : normal,
+                    "to" : self.redirects[normal]})
+                normal = self.redirects[normal]
+            if any(page["title"] == normal for page in pages):
+                continue
+            if normal in self.pages:
+                pages.append({"pageid" : len(pages) + 1, "ns" : 0,
+                    "title" : normal, "fullurl" : "https://mock/wiki/" \
+                    + normal.replace(" ", "_"),
+                    "pageprops" : {"wikibase_item" : "Q1"}})
+            else:
+                pages.append({"ns" : 0, "title" : normal, "missing" : True})
+
+        start = int(params.get("rvcontinue", 0))
+        limit = self.page_limit or len(pages)
+        existing = [page for page in pages if not page.get("missing")]
+        for index, page in enumerate(existing):
+            if start <= index < start + limit:
+                page["revisions"] = [{"slots" : {"main" : {
+                    "content" : self.pages[page["title"]]}}}]
+        payload = {"query" : {"normalized" : normalized,
+            "redirects" : redirects, "pages" : pages}}
+        if start + limit < len(existing):
+            payload["continue"] = {"rvcontinue" : str(start + limit),
+                    "continue" : "||"}
+        return payload
+
+
+@pytest.fixture
+def mock_wiki():
+    """
+    Serve a MockWiki on a local port, yield (MockWiki, api url).
+    """
+    wiki = MockWiki({})
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if wiki.fail:
+                self.send_error(500)
+                return
+            params = dict(URLParse.parse_qsl(
+                URLParse.urlsplit(self.path).query))
+            body = json.dumps(wiki.query(params)).encode("utf8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args, **kwargs):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield wiki, "http://127.0.0.1:{}/w/api.php".format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+def radio_pages(count):
+    return {f"Radio {index}" : INFOBOX.format(index, f"radio{index}") \
+            for index in range(count)}
+
+def test_batches_of_max_titles(mock_wiki):
+    wiki, api_url = mock_wiki
+    wiki.pages = radio_pages(120)
+    client = MediaWikiClient("en", api_url)
+    pages = client.fetch_pages(f"Radio {index}" for index in range(120))
+
+    assert len(pages) == 120
+    assert client.requests == 3
+    assert [len(params["titles"].split("|")) for params in wiki.requests] \
+            == [50, 50, 20]
+    assert pages["Radio 7"]["wikitext"] == wiki.pages["Radio 7"]
+    assert pages["Radio 7"]["url"] == "https://mock/wiki/Radio_7"
+    assert pages["Radio 7"]["wikibase"] == "Q1"
+
+def test_continuation(mock_wiki):
+    wiki, api_url = mock_wiki
+    wiki.pages = radio_pages(30)
+    wiki.page_limit = 8
+    client = MediaWikiClient("en", api_url)
+    pages = client.fetch_pages(f"Radio {index}" for index in range(30))
+
+    assert client.requests == 4
+    assert wiki.requests[1]["rvcontinue"] == "8"
+    assert all(pages[f"Radio {index}"]["wikitext"] == \
+            wiki.pages[f"Radio {index}"] for index in range(30))
+
+def test_aliases_and_missing_pages(mock_wiki):
+    wiki, api_url = mock_wiki
+    wiki.pages = radio_pages(2)
+    wiki.redirects = {"Old radio" : "Radio 1"}
+    client = MediaWikiClient("en", api_url)
+    pages = client.fetch_pages(["radio 0", "old radio", "Radio 1", "Nope",
+        "Radio 0"])
+
+    assert client.requests == 1
+    assert pages["radio 0"]["title"] == "Radio 0"
+    assert pages["old radio"]["title"] == "Radio 1"
+    assert pages["old radio"]["wikitext"] == wiki.pages["Radio 1"]
+    assert pages["Nope"] == {"title" : "Nope", "missing" : True}
+    assert pages["Radio 0"] == pages["radio 0"]
+
+def test_api_error(mock_wiki):
+    wiki, api_url = mock_wiki
+    wiki.fail = True
+    with pytest.raises(ApiError):
+        MediaWikiClient("en", api_url).fetch_pages(["Radio 0"])
+
+def test_page_info_from_client(mock_wiki):
+    wiki, api_url = mock_wiki
+    wiki.pages = radio_pages(1)
+    client = MediaWikiClient("en", api_url)
+    page = PageInfo("Radio 0", "en", client=client)
+
+    assert page.type == PageInfo.RADIO
+    assert page.radio_site == "http://radio0.test"
+    assert client.requests == 1
+    with pytest.raises(PageNotExists):
+        PageInfo("Nope", "en", client=client)
+
+def test_page_info_falls_back_to_wptools(mock_wiki, monkeypatch):
+    wiki, api_url = mock_wiki
+    wiki.fail = True
+
+    class ParseOnlyPage:
+        def __init__(self, title, **kwargs):
+            self.data = {"title" : title, "pageid" : 1,
+                    "wikitext" : INFOBOX.format(title, "fallback")}
+
+        def get_parse(self, show=True):
+            return self
+
+        def get(self, *args, **kwargs):
+            raise AssertionError("full wptools fetch")
+
+    monkeypatch.setattr(wiki_page.wptools, "page", ParseOnlyPage)
+    page = PageInfo("Radio 0", "en", client=MediaWikiClient("en", api_url))
+    assert page.radio_site == "http://fallback.test"
+    assert page.url == "https://en.wikipedia.org/wiki/Radio_0"
+
+def test_controller_batches_radio_pages(mock_wiki, tmp_path, monkeypatch):
+    wiki, api_url = mock_wiki
+    wiki.pages = radio_pages(60)
+    rows = "".join(f"|-\n| [[Radio {index}]] || FM\n" for index in range(60))
+    wiki.pages["List of radios"] = "== Stations ==\n{| class=\"wikitable\"\n" \
+            f"! Name !! Band\n{rows}|}}\n"
+    monkeypatch.chdir(tmp_path)
+    client = MediaWikiClient("en", api_url)
+    controller = SearchController("List of radios", "en", silent=True,
+            client=client)
+    controller.launch()
+
+    #Base page, then 60 radios in 2 batches
+    assert client.requests == 3
+    with open(controller.filename, encoding="utf8") as template:
+        content = template.read()
+    assert "Radio 59;http://radio59.test" in content
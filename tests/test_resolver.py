@@ -0,0 +1,131 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import socket
+import threading
+
+import pytest
+import requests
+
+from scanner import session
+from scanner.ratelimit import RateLimiter
+from scanner.resolver import DnsCache, configure_dns, get_dns_cache
+
+
+class StubResolver:
+    """
+    getaddrinfo like function resolving `hosts` to their address,
+    other hosts don't exist.
+    """
+    def __init__(self, hosts):
+        self.hosts = hosts
+        self.lookups = []
+
+    def __call__(self, host, port, family=0, type=0, proto=0, flags=0):
+        self.lookups.append(host)
+        if host not in self.hosts:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return [(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "",
+            (self.hosts[host], port or 0))]
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = f"<html>{self.headers['Host']}</html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def dns():
+    resolver = StubResolver({"radio.test" : "127.0.0.1",
+        "www.radio.test" : "127.0.0.1"})
+    configure_dns(DnsCache(resolver=resolver))
+    session.configure_session()
+    yield resolver
+    configure_dns(None)
+    session.configure_session()
+
+
+def test_cached_resolution():
+    resolver = StubResolver({"radio.test" : "127.0.0.1"})
+    cache = DnsCache(resolver=resolver)
+    first = cache.getaddrinfo("radio.test", 80)
+    assert cache.getaddrinfo("RADIO.test", 80) == first
+    assert resolver.lookups == ["radio.test"]
+
+def test_dead_host():
+    resolver = StubResolver({})
+    cache = DnsCache(resolver=resolver)
+    for _ in range(2):
+        with pytest.raises(socket.gaierror):
+            cache.getaddrinfo("dead.test", 80)
+    assert resolver.lookups == ["dead.test"]
+    assert cache.is_dead("dead.test")
+
+def test_prefetch():
+    resolver = StubResolver({"radio.test" : "127.0.0.1"})
+    cache = DnsCache(resolver=resolver)
+    assert cache.prefetch(["radio.test", "dead.test", ""]) == {"dead.test"}
+    assert not cache.is_dead("radio.test")
+    assert sorted(resolver.lookups) == ["dead.test", "radio.test"]
+
+def test_expired_entry():
+    resolver = StubResolver({"radio.test" : "127.0.0.1"})
+    cache = DnsCache(ttl=0, resolver=resolver)
+    cache.getaddrinfo("radio.test", 80)
+    cache.getaddrinfo("radio.test", 80)
+    assert resolver.lookups == ["radio.test", "radio.test"]
+
+def test_session_resolves_with_cache(dns, server):
+    page = session.fetch(f"http://radio.test:{server}/", timeout=5)
+    assert page.status == 200
+    assert f"radio.test:{server}" in page.text
+    assert dns.lookups == ["radio.test"]
+
+def test_single_lookup_by_host(dns, server):
+    #Prefetch, rate limiter and connection share the resolution
+    get_dns_cache().prefetch(["radio.test"])
+    session.configure_rate_limit(RateLimiter(ip_rate=100))
+    try:
+        page = session.fetch(f"http://radio.test:{server}/", timeout=5)
+    finally:
+        session.configure_rate_limit(None)
+    assert page.status == 200
+    assert dns.lookups == ["radio.test"]
+
+def test_rate_limiter_resolves_hostname(dns):
+    limiter = RateLimiter(ip_rate=100)
+    limiter.acquire("http://www.radio.test:8080/contact")
+    assert dns.lookups == ["www.radio.test"]
+
+def test_port_and_family():
+    cache = DnsCache(resolver=StubResolver({"radio.test" : "127.0.0.1"}))
+    address = cache.getaddrinfo("radio.test", "8080", socket.AF_INET)[0]
+    assert address[4] == ("127.0.0.1", 8080)
+    assert cache.getaddrinfo("radio.test", None)[0][4] == ("127.0.0.1", 0)
+    with pytest.raises(socket.gaierror):
+        cache.getaddrinfo("radio.test", 80, socket.AF_INET6)
+
+def test_unknown_host_fails(dns):
+    with pytest.raises(requests.ConnectionError):
+        session.fetch("http://dead.test/", timeout=5)
+    assert get_dns_cache().is_dead("dead.test")
+
+def test_process_resolver_untouched(dns):
+    #Only the scanner session uses the cache
+    assert socket.getaddrinfo is not get_dns_cache().getaddrinfo
+    with pytest.raises(socket.gaierror):
+        socket.getaddrinfo("radio.test", 80)
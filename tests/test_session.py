@@ -0,0 +1,52 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+import pytest
+
+from scanner import session
+from scanner.cache import ResponseCache
+
+#Latin-1 page, each accented letter is a single byte
+BODY = "<html>Équipe de la 'Radio Télé'</html>".encode("latin-1")
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=iso-8859-1")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def url():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:{}/".format(httpd.server_address[1])
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetch_size(url):
+    page = session.fetch(url, timeout=5)
+    assert page.text == BODY.decode("latin-1")
+    assert page.size == len(BODY)
+
+def test_cached_page_size(url, tmp_path):
+    session.configure_cache(ResponseCache(str(tmp_path / "cache")))
+    try:
+        assert session.fetch(url, timeout=5).size == len(BODY)
+        cached = session.fetch(url, timeout=5)
+    finally:
+        session.configure_cache(None)
+    assert cached.text == BODY.decode("latin-1")
+    assert cached.size == 0
+
+def test_truncated_size(url):
+    page = session.fetch(url, timeout=5, max_size=10)
+    assert page.size == 10
+    assert page.text == BODY[:10].decode("latin-1")
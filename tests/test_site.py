@@ -0,0 +1,17 @@
+from scanner.errors import LifetimeExceeded
+from scanner.site import Site
+
+
+def test_find_mail(server):
+    site = Site(server, lifetime=10)
+    site.find_mail()
+    assert site.error is None
+    assert site.unsure_mails == {"contact@radio.fm"}
+    assert site.metrics.pages == 2
+
+def test_silent_homepage_fails(silent_server):
+    site = Site(silent_server, lifetime=1)
+    site.find_mail()
+    assert isinstance(site.error, LifetimeExceeded)
+    assert site.metrics.lifetime_exceeded
+    assert site.metrics.pages == 0
@@ -0,0 +1,48 @@
+import gzip
+
+from scanner.sitemap import parse_robots, parse_sitemap
+
+URLSET = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+{}
+</urlset>"""
+INDEX = """<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>http://radio.test/sitemap-1.xml</loc></sitemap>
+  <sitemap><loc> http://radio.test/sitemap-2.xml </loc></sitemap>
+</sitemapindex>"""
+
+
+def urlset(count):
+    return URLSET.format("\n".join("  <url><loc>http://radio.test/{}</loc>"
+        "<lastmod>2020-01-01</lastmod></url>".format(index) \
+                for index in range(count))).encode()
+
+def test_urlset():
+    pages, sitemaps = parse_sitemap(urlset(3))
+    assert pages == [f"http://radio.test/{index}" for index in range(3)]
+    assert sitemaps == []
+
+def test_index():
+    assert parse_sitemap(INDEX.encode()) == ([], [
+        "http://radio.test/sitemap-1.xml", "http://radio.test/sitemap-2.xml"])
+
+def test_gzip_and_text():
+    assert parse_sitemap(gzip.compress(urlset(2)))[0] == \
+            ["http://radio.test/0", "http://radio.test/1"]
+    assert parse_sitemap(b"http://radio.test/a\n\nhttp://radio.test/b\n") \
+            == (["http://radio.test/a", "http://radio.test/b"], [])
+
+def test_truncated_sitemap():
+    content = urlset(100)
+    #Cut in the middle of the 51st url
+    cut = content.index(b"http://radio.test/50<") + 10
+    pages, _ = parse_sitemap(content[:cut])
+    assert pages == [f"http://radio.test/{index}" for index in range(50)]
+
+def test_robots():
+    robots, sitemaps = parse_robots("User-agent: *\nDisallow: /private\n"
+            "Sitemap: http://radio.test/sitemap.xml\n")
+    assert sitemaps == ["http://radio.test/sitemap.xml"]
+    assert not robots.can_fetch("bot", "http://radio.test/private/page")
+    assert robots.can_fetch("bot", "http://radio.test/contact")
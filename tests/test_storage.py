@@ -0,0 +1,35 @@
+import sqlite3
+
+from scanner.frontier import VisitedSet
+from scanner.journal import ScanJournal
+from scanner.radio_info import RadioInfo
+from scanner.storage import RadioDatabase
+
+
+def test_visited_set_sample():
+    visited = VisitedSet(max_urls=3)
+    for index in range(5):
+        visited.add(f"http://radio.test/{index}")
+    visited.add("http://radio.test/0")
+    assert len(visited) == 5
+    assert "http://radio.test/4" in visited
+    assert visited.sample == [f"http://radio.test/{index}" \
+            for index in range(3)]
+
+def test_record_page_count(tmp_path):
+    filename = str(tmp_path / "radios.db")
+    database = RadioDatabase(filename)
+    visited = VisitedSet(max_urls=2)
+    for index in range(4):
+        visited.add(f"http://radio.test/{index}")
+    radio_info = RadioInfo("Radio", "http://radio.test")
+    database.record("section", radio_info, ScanJournal.DONE,
+            visited.sample, None, len(visited))
+    database.close()
+
+    connection = sqlite3.connect(filename)
+    assert connection.execute("SELECT page_count FROM sites")\
+            .fetchone() == (4,)
+    assert connection.execute("SELECT COUNT(*) FROM pages")\
+            .fetchone() == (2,)
+    connection.close()
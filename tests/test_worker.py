@@ -0,0 +1,50 @@
+import time
+
+from scanner.health import SiteHealth, site_key
+from scanner.journal import ScanJournal
+from scanner.radio_info import RadioInfo
+from scanner.site import Site
+from scanner.storage import RadioDatabase
+from scanner.worker import CrawlWorker
+
+
+def statuses(database):
+    return dict(database.connection.execute("SELECT name, status "
+        "FROM radios").fetchall())
+
+def test_worker(tmp_path, monkeypatch, server, silent_server):
+    find_mail = Site.find_mail
+    def broken_find_mail(site):
+        if site.domain == "broken.test":
+            raise RuntimeError("broken site")
+        return find_mail(site)
+    monkeypatch.setattr(Site, "find_mail", broken_find_mail)
+
+    database = RadioDatabase(str(tmp_path / "radios.db"))
+    health = SiteHealth(str(tmp_path / "health.db"), ttl=3600)
+    health.record_failure(site_key("http://skipped.test"), "Timeout")
+    database.import_dataset({"section" : [
+        RadioInfo("radio", server),
+        RadioInfo("silent", silent_server),
+        RadioInfo("broken", "http://broken.test"),
+        RadioInfo("skipped", "http://skipped.test"),
+        ]})
+
+    worker = CrawlWorker(database, concurrency=2, health=health,
+            max_run_time=2)
+    assert worker.run() == 3
+    assert statuses(database) == {
+        "radio" : ScanJournal.DONE,
+        "silent" : ScanJournal.FAILED,
+        "broken" : ScanJournal.FAILED,
+        "skipped" : None,
+        }
+    assert health.failures(site_key(silent_server)) == 1
+    assert health.failures(site_key(server)) == 0
+
+    #Skipped radio stays in the queue until the end of its backoff
+    assert database.pending_count() == 1
+    assert database.lease("other") == []
+    lease_expires, = database.connection.execute("SELECT lease_expires "
+            "FROM radios WHERE name = 'skipped'").fetchone()
+    assert lease_expires > time.time() + 3000
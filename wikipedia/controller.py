@@ -1,9 +1,11 @@
 
+from .mediawiki import MediaWikiClient
 from .page import PageInfo
-from .wiki_error import PageError, ControllerError
+from .template import TemplateWriter
+from .wiki_error import PageError, ControllerError, ApiError
 from collections import OrderedDict
+import itertools
 import logging
-import csv
 import os
 
 logger = logging.getLogger("wiki")
@@ -15,12 +17,16 @@ class SearchController:
 
     Work with a list of radio, and retrieve for each of this
     radio the website available in their own wikipage infobox.
+
+    Radio pages are fetched by batches with a MediaWikiClient.
     """
     NB_CSV_COLUMNS = 4
 
-    def __init__(self, base_title, lang, silent=False, base_page=None):
+    def __init__(self, base_title, lang, silent=False, base_page=None,
+            client=None):
         self.base_title = base_title.strip()
         self.base_page = base_page
+        self.client = client or MediaWikiClient(lang)
         self.silent = silent
         self.childs = []
         self.parsed = set()
@@ -35,16 +41,24 @@ class SearchController:
 
     def _launch(self):
         if not self.base_page:
-            self.base_page = self._search_page(self.base_title, False)
+            pages = self._fetch_pages([self.base_title])
+            self.base_page = self._search_page(self.base_title, False,
+                    pages.get(self.base_title))
 
         if self.base_page.type != PageInfo.LIST:
             err_msg = "'{}' not a page of radio listing."
             raise ControllerError(err_msg.format(self.base_title))
 
         logger.info(f"Controller begin with : '{self.base_title}'")
+        table_sections = {id(table):section_name for section_name, table \
+                in self._section_tables(self.base_page.tables_by_section)}
+
         #Generator, will allow saving between each table parsing.
-        for table in self._search_tables():
-            self.save()
+        with TemplateWriter(self.filename, self.NB_CSV_COLUMNS) as writer:
+            for table in self._search_tables():
+                writer.write_table(table_sections[id(table)],
+                        filter(self._allow_radio_save, table))
+                writer.flush()
 
     def launch(self):
         """
@@ -58,7 +72,24 @@ class SearchController:
         with self:
             self._launch()
 
-    def _search_page(self, title, catch=True):
+    def _fetch_pages(self, titles):
+        """
+        Fetch pages of a list of titles with the MediaWiki API.
+
+        Pages missing from the result (API failure, page without
+        content) are fetched by PageInfo itself.
+
+        return: {title : page data}
+        """
+        try:
+            pages = self.client.fetch_pages(titles)
+        except ApiError as Error:
+            logger.warning(Error)
+            return {}
+        return {title : data for title, data in pages.items() \
+                if data.get("missing") or "wikitext" in data}
+
+    def _search_page(self, title, catch=True, data=None):
         """
         Layer to perform the seach a of wiki page.
         
@@ -67,6 +98,8 @@ class SearchController:
 
         Control errors of expected page.
 
+        Use page `data` when already fetched.
+
         return: None or the corresponding PageInfo.
         """
         page = None
@@ -79,7 +112,8 @@ class SearchController:
 
         #Retrieve wikipedia page, manage errors.
         try:
-            page = PageInfo(title, self.lang, silent=self.silent)
+            page = PageInfo(title, self.lang, silent=self.silent, data=data,
+                    client=self.client)
         except (PageError, ValueError) as Error:
             logger.warning(Error)
             if catch == False:
@@ -90,15 +124,29 @@ class SearchController:
         """
         Research individual radio wiki page 
         in all tables of the base_page.
+
+        Pages are fetched by batches of MAX_TITLES radios, taken
+        from the current table and the following ones.
         """
+        titles = [str(radio) for radios_table in self.base_page.tables \
+                for radio in radios_table if radio.have_wiki]
+        pending = iter(titles)
+        pages = {}
         for radios_table in self.base_page.tables:
             #Remove table's radios without wiki.
-            radio_with_wiki = filter(lambda radio:radio.have_wiki,
-                    radios_table)
+            radio_with_wiki = [radio for radio in radios_table \
+                    if radio.have_wiki]
 
             #Research radio wiki
             for radio in radio_with_wiki:
-                wiki_page = self._search_page(radio)
+                title = str(radio)
+                if title not in pages and title not in self.parsed:
+                    batch = itertools.islice((pending_title for pending_title \
+                            in pending if pending_title not in self.parsed),
+                            self.client.MAX_TITLES)
+                    pages.update(self._fetch_pages(list(batch)))
+                wiki_page = self._search_page(radio, data=pages.pop(title,
+                    None))
                 if wiki_page is None:
                     continue
 
@@ -108,26 +156,13 @@ class SearchController:
                 #Create new controller for a wiki with radio listing.
                 elif wiki_page.type == PageInfo.LIST:
                     new_control = SearchController(str(radio), 
-                            lang=self.lang, base_page=wiki_page)
+                            lang=self.lang, base_page=wiki_page,
+                            client=self.client)
                     self.childs.append(new_control)
 
             #Stop at each table, to perform saving.
             yield radios_table
 
-    def save(self):
-        """
-        Write in csv file all parsed informations.
-        """
-        self.rm()
-        self._save_sections(self.base_page.tables_by_section)
-
-    def rm(self):
-        """
-        Remove csv file related to the controller.
-        """
-        if os.path.exists(self.filename):
-            os.unlink(self.filename)
-
     @staticmethod
     def _allow_radio_save(radio_search):
         """
@@ -137,45 +172,24 @@ class SearchController:
             return True
         return False
 
-    def _save_sections(self, section_dict, parent_section=[]):
+    def _section_tables(self, section_dict, parent_section=[]):
         """
-        Recursive save of each sections of a page.
-        Save each list of table for each section/subsection dict.
+        Recursive walk of each sections of a page, in the same
+        order as PageInfo.tables.
+
+        Generate (section name, RadioTable) for each table
+        of each section/subsection dict.
         """
         for section_title in section_dict.keys():
             subsection_base = parent_section + [section_title]
             section_content = section_dict[section_title]
             if type(section_content) == list:
-                self._save_tables(section_content, subsection_base)
+                section_name = "/".join(subsection_base)
+                for table in section_content:
+                    yield section_name, table
             elif type(section_content) == OrderedDict:
-                self._save_sections(section_content, subsection_base)
-
-    def _save_tables(self, section_tables, parent_section):
-        """
-        Save single list of RadioTable. Write a row in self.filename
-        for each radio field.
-        """
-        section_name = "/".join(parent_section)
-        title_printed = False
-        for table in section_tables:
-            for radio in filter(self._allow_radio_save, table):
-                #Display section title on first print
-                if title_printed == False:
-                    self._write_row([section_name])
-                    title_printed = True
-
-                #Format a radio row and write it to self.filename
-                field = radio.format() # NEEDED
-                self._write_row(field)
-
-    def _write_row(self, row):
-        """
-        Write single row at the end of the attached csv file.
-        """
-        row = row + [""] * (self.NB_CSV_COLUMNS - len(row))
-        with open(self.filename, 'a', encoding="utf8") as datafile:
-            writer = csv.writer(datafile, delimiter=";")
-            writer.writerow(row)
+                yield from self._section_tables(section_content,
+                        subsection_base)
 
     def _choose_filename(self, filename):
         """
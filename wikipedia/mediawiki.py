@@ -0,0 +1,136 @@
+import logging
+import requests
+from .wiki_error import ApiError
+
+logger = logging.getLogger("wiki")
+
+API_URL = "https://{lang}.wikipedia.org/w/api.php"
+USER_AGENT = "radio-parser (https://github.com/AbcSxyZ/radio-parser)"
+
+
+class MediaWikiClient:
+    """
+    Fetch wikitext of wikipedia pages with the MediaWiki action API,
+    by batches of up to MAX_TITLES titles per request instead of
+    several requests per page.
+
+    Pages are retrieved as dict, like wptools page data:
+    {"title", "pageid", "url", "wikitext", "wikibase"}, or
+    {"title", "missing"} for pages which don't exist.
+    "wikibase" is the Wikidata item of the page, when it has one.
+    """
+    #Titles limit of a query request for non bot users
+    MAX_TITLES = 50
+    TIMEOUT = 30
+
+    def __init__(self, lang, api_url=None):
+        self.lang = lang
+        self.api_url = (api_url or API_URL).format(lang=lang)
+        self.requests = 0
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = USER_AGENT
+
+    def fetch_pages(self, titles):
+        """
+        Retrieve pages of a list of titles, following redirections.
+
+        return: {requested title : page data}
+        """
+        titles = list(dict.fromkeys(str(title) for title in titles))
+        pages = {}
+        for index in range(0, len(titles), self.MAX_TITLES):
+            pages.update(self._fetch_batch(titles[index:index \
+                    + self.MAX_TITLES]))
+        return pages
+
+    def fetch_page(self, title):
+        return self.fetch_pages([title])[str(title)]
+
+    def _query(self, params):
+        """
+        Send a single API request, return its json response.
+        """
+        self.requests += 1
+        try:
+            response = self._session.get(self.api_url, params=params,
+                    timeout=self.TIMEOUT)
+            response.raise_for_status()
+            payload = response.json()
+        except (requests.RequestException, ValueError) as Error:
+            raise ApiError(f"{self.api_url} : {Error}") from Error
+        if "error" in payload:
+            raise ApiError("{} : {}".format(self.api_url,
+                payload["error"].get("info", payload["error"])))
+        return payload
+
+    def _fetch_batch(self, titles):
+        """
+        Retrieve pages of at most MAX_TITLES titles, following
+        continuations of responses truncated by the API.
+        """
+        params = {
+            "action" : "query",
+            "format" : "json",
+            "formatversion" : "2",
+            "prop" : "revisions|info|pageprops",
+            "rvprop" : "content",
+            "rvslots" : "main",
+            "inprop" : "url",
+            "ppprop" : "wikibase_item",
+            "redirects" : "1",
+            "titles" : "|".join(titles),
+            }
+        aliases = {}
+        found = {}
+        while True:
+            payload = self._query(params)
+            query = payload.get("query", {})
+            for alias in query.get("normalized", []) + \
+                    query.get("redirects", []):
+                aliases[alias["from"]] = alias["to"]
+            for page in query.get("pages", []):
+                self._store_page(found, page)
+            if "continue" not in payload:
+                break
+            params.update(payload["continue"])
+        logger.info(f"Wiki batch of {len(titles)} titles, "
+                f"{len(found)} pages found")
+
+        pages = {}
+        for title in titles:
+            page_title = self._resolve(title, aliases)
+            pages[title] = found.get(page_title,
+                    {"title" : page_title, "missing" : True})
+        return pages
+
+    @staticmethod
+    def _store_page(found, page):
+        """
+        Add a page of a query response to found pages, a page without
+        its content is completed by a continuation response.
+        """
+        if page.get("missing") or page.get("invalid"):
+            return None
+        data = found.setdefault(page["title"], {
+            "title" : page["title"],
+            "pageid" : page.get("pageid"),
+            "url" : page.get("fullurl"),
+            })
+        wikibase = page.get("pageprops", {}).get("wikibase_item")
+        if wikibase:
+            data["wikibase"] = wikibase
+        revisions = page.get("revisions")
+        if revisions:
+            data["wikitext"] = revisions[0]["slots"]["main"]["content"]
+
+    @staticmethod
+    def _resolve(title, aliases):
+        """
+        Final title of a requested title, after normalization
+        and redirections.
+        """
+        seen = set()
+        while title in aliases and title not in seen:
+            seen.add(title)
+            title = aliases[title]
+        return title
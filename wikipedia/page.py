@@ -1,8 +1,9 @@
 import wikitextparser as wtp
 import wptools
+from .mediawiki import MediaWikiClient
 from .table import RadioTable
 import logging
-from .wiki_error import PageError, TableError, PageNotExists
+from .wiki_error import PageError, TableError, PageNotExists, ApiError
 from collections import OrderedDict
 
 logger = logging.getLogger('wiki')
@@ -15,6 +16,11 @@ class PageInfo:
     A page can be:
     - a radio page
     - a list of radio
+
+    Only the wikitext of the page is fetched, with a MediaWikiClient
+    (or wptools parse request when the API fails), unless its `data`
+    were already fetched. Wikidata are fetched on demand, for
+    {{Official URL}} infoboxes.
     """
     REMOVED_SECTION = [
             "see also",
@@ -35,21 +41,28 @@ class PageInfo:
             "hp",
             ]
 
+    #Wikidata property of official websites
+    WIKIDATA_WEBSITE_PROPERTY = "P856"
+
     RADIO = 1
     LIST = 0
 
-    def __init__(self, title, lang, silent=False):
+    def __init__(self, title, lang, silent=False, data=None, client=None):
         self.title = title
-        #Fetch page from wikipedia
-        try:
-            self._page = wptools.page(title, silent=silent, lang=lang).get()
-            logger.info("Wiki parse {}".format(self.url))
-        except LookupError:
+        self.lang = lang
+        self.silent = silent
+        self.client = client
+        if data is None:
+            data = self._fetch_page()
+        if data.get("missing"):
             err_msg = f"\"{title}\" not found"
             logger.warning(err_msg)
             raise PageNotExists(err_msg)
+        self.data = data
+        self._wikidata = None
+        logger.info("Wiki parse {}".format(self.url))
 
-        self.ast = wtp.parse(self._page.data['wikitext'])
+        self.ast = wtp.parse(self.data['wikitext'])
         self.type = None
 
         #Detect radio pages by searching a radio infobox
@@ -74,6 +87,52 @@ class PageInfo:
         err_msg = "{} : Invalid url, not a radio station or listing"
         raise PageError(err_msg.format(self.url))
 
+    def _fetch_page(self):
+        """
+        Fetch the wikitext of the page from wikipedia, with its
+        page id, url and Wikidata item.
+        return: page data
+        """
+        client = self.client or MediaWikiClient(self.lang)
+        try:
+            data = client.fetch_page(self.title)
+            if data.get("missing") or "wikitext" in data:
+                return data
+        except ApiError as Error:
+            logger.warning(Error)
+
+        #Parse request only, without query, RESTBase and Wikidata ones
+        try:
+            page = wptools.page(self.title, silent=self.silent,
+                    lang=self.lang).get_parse(show=False)
+        except LookupError:
+            return {"title" : self.title, "missing" : True}
+        page.data.setdefault("url", "https://{}.wikipedia.org/wiki/{}"\
+                .format(self.lang, page.data["title"].replace(" ", "_")))
+        return page.data
+
+    @property
+    def wikidata(self):
+        """
+        Wikidata claims of the page with labels of the official
+        website property, fetched on first use.
+        """
+        if self._wikidata is None:
+            wikibase = self.data.get("wikibase")
+            if wikibase:
+                page = wptools.page(wikibase=wikibase, silent=self.silent,
+                        lang=self.lang)
+            else:
+                page = wptools.page(self.data["title"], silent=self.silent,
+                        lang=self.lang)
+            page.wanted_labels([self.WIKIDATA_WEBSITE_PROPERTY])
+            try:
+                self._wikidata = page.get_wikidata(show=False).data
+            except LookupError as Error:
+                logger.warning(f"{self.url} : no wikidata, {Error}")
+                self._wikidata = {}
+        return self._wikidata
+
     def manage_datatype(self):
         """
         Try to retrieve table or list in a page. Group founded element
@@ -114,7 +173,7 @@ class PageInfo:
             else:
                 title = section.title
         else:
-            title = self._page.data['title']
+            title = self.data['title']
         return title.strip()
 
 
@@ -179,7 +238,7 @@ class PageInfo:
 
     @property
     def url(self):
-        return self._page.data['url']
+        return self.data['url']
 
     @property
     def have_table(self):
@@ -187,7 +246,7 @@ class PageInfo:
 
     @property
     def id(self):
-        return self._page.data["pageid"]
+        return self.data["pageid"]
 
     def allowed_section(self, section):
         """
@@ -254,7 +313,7 @@ class PageInfo:
         """
         website_labels = ["official url", "official website"]
         labels = {value:key for key, value in \
-                self._page.data["labels"].items()}
+                self.wikidata.get("labels", {}).items()}
 
         item_id = None
         index = 0
@@ -262,5 +321,8 @@ class PageInfo:
             item_id = labels.get(website_labels[index], None)
             index += 1
         if item_id is None:
+            item_id = self.WIKIDATA_WEBSITE_PROPERTY
+        claims = self.wikidata.get("claims", {})
+        if not claims.get(item_id):
             return None
-        return self._page.data['claims'][item_id][0]
+        return claims[item_id][0]
@@ -0,0 +1,65 @@
+import csv
+import os
+
+
+class TemplateWriter:
+    """
+    Buffered writer of a .template file, filled table by table.
+
+    Rows are written in a temporary '.part' file, kept open for the
+    whole search, and flushed on disk after each table. The template
+    is renamed to its final name once complete, so an existing
+    template is never half written.
+    """
+    def __init__(self, filename, nb_columns):
+        self.filename = filename
+        self.nb_columns = nb_columns
+        self._part_filename = filename + ".part"
+        self._stream = open(self._part_filename, "w", encoding="utf8",
+                newline="")
+        self._writer = csv.writer(self._stream, delimiter=";")
+        self._section = None
+
+    def write_table(self, section_name, radios):
+        """
+        Write a row for each radio of a table, preceded by the section
+        title when this section has no row yet.
+        """
+        for radio in radios:
+            #Display section title on first print
+            if self._section != section_name:
+                self.write_row([section_name])
+                self._section = section_name
+
+            #Format a radio row
+            self.write_row(radio.format())
+
+    def write_row(self, row):
+        row = row + [""] * (self.nb_columns - len(row))
+        self._writer.writerow(row)
+
+    def flush(self):
+        """
+        Make written rows persistent in the '.part' file.
+        """
+        self._stream.flush()
+        os.fsync(self._stream.fileno())
+
+    def close(self):
+        """
+        Publish the complete template under its final name.
+        """
+        self.flush()
+        self._stream.close()
+        os.replace(self._part_filename, self.filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args, **kwargs):
+        #Keep an interrupted template in the '.part' file
+        if exc_type is not None:
+            self.flush()
+            self._stream.close()
+            return None
+        self.close()
@@ -22,6 +22,10 @@ class DuplicateSearch(PageError):
     """
     __module__ = "WikiPage"
 
+class ApiError(WikipediaRadioError):
+    """ Failed request to the MediaWiki API. """
+    __module__ = "WikiApi"
+
 class ControllerError(WikipediaRadioError):
     __module__ = "WikiController"
     pass